@@ -0,0 +1,169 @@
+###
+#    WARC-style recording and replay of a scrape run.
+#
+#    With --record every fetch the scraper makes is appended to a
+#    .warc.gz archive, one gzip member per record as in WARC files:
+#
+#        resource   html of a page rendered by the browser (page_source)
+#        request    an HTTP request and its headers
+#        response   the HTTP response, status line, headers and body
+#        metadata   a fetch that failed, with its error kind
+#
+#    --replay serves the archive back to scrape_jobs() in the order it was
+#    recorded, failures included, with no browser, network or sleeps, so
+#    parsing and the rest of the pipeline can be measured on their own.
+###
+
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from threading import Lock
+from urllib.parse import urlsplit
+from uuid import uuid4
+import gzip
+import json
+
+from fetch import Response
+from retry import PageError, classify_error
+
+WARC_VERSION = 'WARC/1.1'
+
+
+def default_archive_name():
+    return 'brightermondayjobs_{}.warc.gz'.format(datetime.now().strftime('%Y%m%d-%H%M%S'))
+
+
+class ArchiveWriter:
+    """ Appends WARC-style records to a gzipped archive
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.records = 0
+        self.lock = Lock()
+
+    def write_record(self, record_type, url, content_type, block, fields=()):
+        header = OrderedDict([
+            ('WARC-Type', record_type),
+            ('WARC-Record-ID', '<urn:uuid:{}>'.format(uuid4())),
+            ('WARC-Date', datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')),
+            ('WARC-Target-URI', url),
+            ('Content-Type', content_type),
+            ('Content-Length', str(len(block))),
+        ])
+        header.update(fields)
+        head = WARC_VERSION + '\r\n' + ''.join('{}: {}\r\n'.format(k, v) for k, v in header.items()) + '\r\n'
+        with self.lock:
+            # One gzip member per record, so the archive can be appended to
+            # and read back with any WARC tool
+            with gzip.open(self.file_name, 'ab') as f:
+                f.write(head.encode('utf-8') + block + b'\r\n\r\n')
+            self.records += 1
+
+    # A page as the browser rendered it
+    def record_page(self, url, html, kind):
+        self.write_record('resource', url, 'text/html; charset=utf-8', html.encode('utf-8'),
+                [('X-Page-Kind', kind), ('X-Fetched-By', 'selenium')])
+
+    # An HTTP exchange, as a request record and a response record
+    def record_response(self, response, kind):
+        parts = urlsplit(response.url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        request_head = 'GET {} HTTP/1.1\r\nHost: {}\r\n'.format(path, parts.netloc) + \
+                ''.join('{}: {}\r\n'.format(k, v) for k, v in response.request_headers.items()) + '\r\n'
+        self.write_record('request', response.url, 'application/http; msgtype=request',
+                request_head.encode('utf-8'), [('X-Page-Kind', kind)])
+
+        response_head = 'HTTP/1.1 {} {}\r\n'.format(response.status, response.reason) + \
+                ''.join('{}: {}\r\n'.format(k, v) for k, v in response.headers) + '\r\n'
+        self.write_record('response', response.url, 'application/http; msgtype=response',
+                response_head.encode('utf-8') + response.body, [('X-Page-Kind', kind), ('X-Fetched-By', 'http')])
+
+    def record_error(self, url, error):
+        block = json.dumps(OrderedDict([
+            ('error_kind', classify_error(error)),
+            ('error', str(error).strip().split('\n')[0]),
+        ])).encode('utf-8')
+        self.write_record('metadata', url, 'application/json', block, [('X-Fetch-Failed', 'true')])
+
+
+# Yields (header OrderedDict, block bytes) for every record in an archive
+def read_records(file_name):
+    with gzip.open(file_name, 'rb') as f:
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if line.strip().decode('utf-8') != WARC_VERSION:
+                raise ValueError('{} is not a WARC archive: unexpected line {!r}'.format(file_name, line[:40]))
+            header = OrderedDict()
+            for line in iter(f.readline, b'\r\n'):
+                if not line:
+                    raise ValueError('{} ends in the middle of a record'.format(file_name))
+                name, _, value = line.decode('utf-8').partition(':')
+                header[name.strip()] = value.strip()
+            yield header, f.read(int(header['Content-Length']))
+
+
+# Rebuilds a fetch.Response from a response record's block
+def parse_http_response(url, block):
+    head, _, body = block.partition(b'\r\n\r\n')
+    lines = head.decode('iso-8859-1').split('\r\n')
+    _, status, reason = (lines[0].split(' ', 2) + [''])[:3]
+    headers = [tuple(part.strip() for part in line.split(':', 1)) for line in lines[1:] if ':' in line]
+    return Response(url, int(status), reason, headers, body)
+
+
+class ReplaySource:
+    """ Serves a recorded run back, page by page, in recording order
+        Logic: Each URL's recordings are handed out in turn, so a fetch that
+        failed and was then retried fails and recovers the same way again.
+        Once they run out the last one keeps being served.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        # url -> deque of html strings or PageErrors
+        self.recordings = OrderedDict()
+        # url -> 'listing' or 'detail'
+        self.kinds = {}
+        for header, block in read_records(file_name):
+            url = header['WARC-Target-URI']
+            record_type = header['WARC-Type']
+            if record_type == 'resource':
+                recording = block.decode('utf-8')
+            elif record_type == 'response':
+                recording = parse_http_response(url, block)
+            elif record_type == 'metadata' and header.get('X-Fetch-Failed') == 'true':
+                failure = json.loads(block.decode('utf-8'))
+                recording = PageError(failure['error_kind'], failure['error'])
+            else:
+                continue
+            self.recordings.setdefault(url, deque()).append(recording)
+            if 'X-Page-Kind' in header:
+                self.kinds[url] = header['X-Page-Kind']
+
+    def __len__(self):
+        return sum(len(recordings) for recordings in self.recordings.values())
+
+    # Number of distinct URLs of the given kind
+    def count(self, kind):
+        return sum(1 for url_kind in self.kinds.values() if url_kind == kind)
+
+    # The next recording for `url`: a fetch.Response for HTTP fetches, html
+    # for browser ones. Recorded failures are raised again.
+    def next_recording(self, url):
+        recordings = self.recordings.get(url)
+        if not recordings:
+            raise KeyError('{} was not recorded'.format(url))
+        recording = recordings.popleft() if len(recordings) > 1 else recordings[0]
+        if isinstance(recording, Exception):
+            raise recording
+        return recording
+
+    def get(self, url):
+        recording = self.next_recording(url)
+        return recording.text if isinstance(recording, Response) else recording
@@ -0,0 +1,13 @@
+###
+#    Benchmarks for parsing, loading and searching scraped job listings.
+#
+#    Run from the src folder:
+#
+#        python -m benchmarks                         # default scales
+#        python -m benchmarks --scales 10000,100000,1000000
+#        python -m benchmarks --save-baseline         # store results
+#        python -m benchmarks --compare               # flag regressions
+#
+#    All data is generated from the bundled snapshot with a fixed seed, so
+#    results are comparable between runs on the same machine.
+###
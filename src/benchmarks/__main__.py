@@ -0,0 +1,75 @@
+from argparse import ArgumentParser
+import json
+import os
+import platform
+import sys
+import tempfile
+
+from benchmarks.imports import report_import_budget, run_import_budget
+from benchmarks.memory import DEFAULT_MEMORY_JOBS, run_memory
+from benchmarks.suite import compare, run_suite
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+parser = ArgumentParser(prog='python -m benchmarks')
+parser.add_argument('--scales', default='10000,100000', help='Comma separated snapshot sizes to benchmark, '
+        'e.g. 10000,100000,1000000')
+parser.add_argument('--repeat', type=int, default=5, help='Runs per benchmark')
+parser.add_argument('--only', help='Only run benchmarks whose name contains this text')
+parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'bmscraper-bench'),
+        help='Where generated snapshots are kept between runs')
+parser.add_argument('--output', help='Write results to this json file')
+parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline results file')
+parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+parser.add_argument('--compare', action='store_true', help='Flag benchmarks slower than the baseline')
+parser.add_argument('--imports', action='store_true', help='Only check the import time budget of the search '
+        'entry points, see benchmarks/imports.py')
+parser.add_argument('--memory', nargs='?', type=int, const=DEFAULT_MEMORY_JOBS, metavar='JOBS', help='Only '
+        'measure the memory held per loaded job on a synthetic store of JOBS jobs (default: {})'.format(
+            DEFAULT_MEMORY_JOBS))
+parser.add_argument('--recorded', metavar='ARCHIVE', help='Also time parsing on the listing and detail pages '
+        'of a scrape recorded with --record')
+parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown before a benchmark counts '
+        'as a regression (0.2 = 20%%)')
+args = parser.parse_args()
+
+if args.imports:
+    if not report_import_budget(run_import_budget(args.data_dir, args.repeat)):
+        sys.exit(1)
+    sys.exit(0)
+
+if args.memory:
+    results = run_memory(args.memory, args.data_dir)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'memory': results},
+                    f, indent=2)
+    sys.exit(0)
+
+scales = [int(scale) for scale in args.scales.split(',') if scale]
+results = run_suite(scales, args.data_dir, args.repeat, args.only, recorded_archive=args.recorded)
+
+document = {
+    'python': platform.python_version(),
+    'machine': platform.machine(),
+    'results': results,
+}
+if args.output:
+    with open(args.output, 'w') as f:
+        json.dump(document, f, indent=2)
+if args.save_baseline:
+    with open(args.baseline, 'w') as f:
+        json.dump(document, f, indent=2)
+    print('Baseline saved to file: {}'.format(args.baseline))
+
+if args.compare:
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+    print()
+    if regressions:
+        for key, before, after in regressions:
+            print('REGRESSION {:45} {:10.3f} ms -> {:10.3f} ms ({:+.0%})'.format(
+                key, before * 1000, after * 1000, after / before - 1))
+        sys.exit(1)
+    print('No regressions against {}'.format(args.baseline))
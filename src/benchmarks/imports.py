@@ -0,0 +1,104 @@
+###
+#    Import-time budget for the entry points that must stay light.
+#
+#    Every case runs in a fresh interpreter under `python -X importtime`.
+#    A case fails when it takes longer than its budget or when it imports
+#    any part of the scraping stack, which searches never need.
+###
+
+from collections import OrderedDict
+from statistics import median
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.suite import BATCH_QUERIES
+from benchmarks.synth import write_snapshot
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages a search or a library user must never import
+FORBIDDEN = ('selenium', 'webdriver_manager', 'bs4', 'lxml', 'uuid', 'urllib.request')
+
+# Case -> import time budget in milliseconds, on top of interpreter startup.
+# About twice what the standard library modules involved take on a laptop;
+# bs4 alone takes longer than any of these.
+IMPORT_BUDGETS = OrderedDict([
+    ('import store', 40),
+    ('import search', 60),
+    ('import server', 150),
+    ('import bmscraper', 100),
+    ('bmscraper.py --batch', 120),
+])
+
+
+# Runs `argv` under -X importtime and returns (module, cumulative seconds,
+# nested) for every module it imported
+def importtime(argv):
+    process = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=SRC_DIR, capture_output=True,
+            text=True)
+    if process.returncode != 0:
+        raise RuntimeError('{} failed:\n{}'.format(' '.join(argv), process.stderr[-2000:]))
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(cumulative_us) / 1e6, name.startswith('  ')))
+    return imports
+
+
+# Import time of `argv` beyond the modules in `startup`, which a bare
+# interpreter imports anyway. Nested imports are part of their parent's
+# cumulative time.
+def import_seconds(imports, startup):
+    return sum(seconds for name, seconds, nested in imports if not nested and name not in startup)
+
+
+def forbidden_imports(imports):
+    return sorted({name for name, seconds, nested in imports
+            if any(name == forbidden or name.startswith(forbidden + '.') for forbidden in FORBIDDEN)})
+
+
+def import_cases(data_dir):
+    os.makedirs(data_dir, exist_ok=True)
+    snapshot = write_snapshot(1000, os.path.join(data_dir, 'brightermondayjobs_imports-1000.json'))
+    queries = os.path.join(data_dir, 'import_queries.json')
+    with open(queries, 'w') as f:
+        json.dump(BATCH_QUERIES, f)
+    output = os.path.join(data_dir, 'import_results.json')
+    return OrderedDict([
+        ('import store', ['-c', 'import store']),
+        ('import search', ['-c', 'import search']),
+        ('import server', ['-c', 'import server']),
+        ('import bmscraper', ['-c', 'import bmscraper']),
+        ('bmscraper.py --batch', ['bmscraper.py', '-f', snapshot, '-b', queries, '-o', output]),
+    ])
+
+
+# Measures every case `repeat` times and returns rows of (case, median
+# seconds, budget seconds, forbidden modules imported)
+def run_import_budget(data_dir, repeat=5):
+    startup = {name for name, seconds, nested in importtime(['-c', 'pass'])}
+    rows = []
+    for name, argv in import_cases(data_dir).items():
+        runs = [importtime(argv) for _ in range(repeat)]
+        seconds = median(import_seconds(imports, startup) for imports in runs)
+        rows.append((name, seconds, IMPORT_BUDGETS[name] / 1000, forbidden_imports(runs[0])))
+    return rows
+
+
+# Prints the results and returns True if every case is within budget
+def report_import_budget(rows):
+    ok = True
+    print('{:25} {:>10} {:>10}'.format('Case', 'ms', 'budget'))
+    for name, seconds, budget, forbidden in rows:
+        status = ''
+        if seconds > budget:
+            status = 'OVER BUDGET'
+        if forbidden:
+            status = 'IMPORTS {}'.format(', '.join(forbidden))
+        ok = ok and not status
+        print('{:25} {:10.1f} {:10.0f} {}'.format(name, seconds * 1000, budget * 1000, status))
+    return ok
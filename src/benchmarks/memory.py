@@ -0,0 +1,70 @@
+###
+#    Memory held per loaded job, measured with tracemalloc.
+#
+#    The same synthetic store is loaded as plain dicts (what json.load
+#    gives), as OrderedDicts (what the scraper used to build) and as
+#    job.Job records (what store.load_jobs gives now).
+###
+
+from collections import OrderedDict
+from time import perf_counter
+import gc
+import json
+import os
+import tracemalloc
+
+from store import load_jobs
+
+from benchmarks.synth import write_snapshot
+
+DEFAULT_MEMORY_JOBS = 1000000
+
+
+def load_dicts(file_name):
+    with open(file_name, 'r') as f:
+        return json.load(f)
+
+
+def load_ordered_dicts(file_name):
+    with open(file_name, 'r') as f:
+        return json.load(f, object_pairs_hook=OrderedDict)
+
+
+LOADERS = OrderedDict([
+    ('dict', load_dicts),
+    ('OrderedDict', load_ordered_dicts),
+    ('Job', load_jobs),
+])
+
+
+# Loads `file_name` with `loader` under tracemalloc and returns (bytes held
+# once loaded, peak bytes while loading, seconds)
+def traced_load(loader, file_name):
+    gc.collect()
+    tracemalloc.start()
+    started = perf_counter()
+    jobs = loader(file_name)
+    seconds = perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del jobs
+    gc.collect()
+    return current, peak, seconds
+
+
+# Measures every loader on a lean synthetic store of `count` jobs and
+# returns {loader: {'bytes_per_job', 'peak_bytes', 'seconds'}}
+def run_memory(count, data_dir, report=print):
+    os.makedirs(data_dir, exist_ok=True)
+    file_name = write_snapshot(count, os.path.join(data_dir, 'synthetic_{}_lean.json'.format(count)), False)
+    results = OrderedDict()
+    for name, loader in LOADERS.items():
+        current, peak, seconds = traced_load(loader, file_name)
+        results[name] = OrderedDict([
+            ('bytes_per_job', current / count),
+            ('peak_bytes', peak),
+            ('seconds', seconds),
+        ])
+        report('memory/{}/{:12} {:8.0f} bytes per job   peak {:8.1f} MiB   load {:7.2f} s (traced)'.format(
+            count, name, current / count, peak / 2 ** 20, seconds))
+    return results
@@ -0,0 +1,180 @@
+###
+#    Benchmark cases and the runner that times them.
+###
+
+from collections import OrderedDict
+from statistics import median
+from time import perf_counter
+import json
+import os
+
+from parse import parse_job_details, parse_listing
+from search import JobIndex, run_batch
+from store import load_jobs
+
+from benchmarks.synth import generate_jobs, render_detail_page, render_listing_page, write_snapshot
+
+# Jobs on one listing page of the live site
+PAGE_SIZE = 25
+
+# Snapshots above this size are generated without the bulky detail html
+LEAN_ABOVE = 100000
+
+SEARCHES = OrderedDict([
+    ('search_by_title', ('search_by_title', 'developer')),
+    ('search_by_location', ('search_by_location', 'nairobi')),
+    ('search_by_postedby', ('search_by_postedby', 'brightermonday')),
+    ('search_by_date_posted', ('search_by_date_posted', '1 week ago')),
+    ('search_by_all', ('search_by_all', 'engineer', 'remote', '', '1 week ago')),
+])
+
+BATCH_QUERIES = [
+    {'name': 'q{}'.format(number), 'title': title, 'location': location}
+    for number, (title, location) in enumerate([
+        ('developer', 'nairobi'), ('sales', ''), ('accountant', 'mombasa'), ('engineer', 'remote'),
+        ('manager', ''), ('designer', 'kisumu'), ('intern', ''), ('consultant', 'nakuru'),
+    ])
+]
+
+
+# Times `func` `repeat` times and returns summary statistics in seconds
+def measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = perf_counter()
+        func()
+        samples.append(perf_counter() - started)
+    return OrderedDict([
+        ('min', min(samples)),
+        ('median', median(samples)),
+        ('max', max(samples)),
+        ('repeat', repeat),
+    ])
+
+
+# The original search: lowercase and compare every job on every query
+def scan_title(jobs, title):
+    return [job for job in jobs if title.lower() in job['Title'].lower()]
+
+
+# Listing and detail pages of a run recorded with --record, as
+# {'listing': [html, ...], 'detail': [html, ...]}. The first recording of
+# each URL that didn't fail is used.
+def recorded_pages(archive_file):
+    from archive import ReplaySource
+    from fetch import Response
+    source = ReplaySource(archive_file)
+    pages = OrderedDict([('listing', []), ('detail', [])])
+    for url, recordings in source.recordings.items():
+        kind = source.kinds.get(url)
+        if kind not in pages:
+            continue
+        for recording in recordings:
+            if isinstance(recording, Response):
+                pages[kind].append(recording.text)
+                break
+            if isinstance(recording, str):
+                pages[kind].append(recording)
+                break
+    return pages
+
+
+# The synthetic pages are rendered from parse.py's own class names, so they
+# always match the parser; pages recorded from the live site, when given,
+# keep the benchmark honest about its real markup
+def parse_cases(recorded=None):
+    jobs = generate_jobs(PAGE_SIZE)
+    listing_html = render_listing_page(jobs)
+    detail_html = render_detail_page(jobs[0])
+    cases = OrderedDict([
+        ('parse_listing_page', lambda: parse_listing(listing_html)),
+        ('parse_job_details', lambda: parse_job_details(detail_html)),
+    ])
+    if recorded is not None:
+        if recorded['listing']:
+            cases['parse_recorded_listings'] = lambda: [parse_listing(html) for html in recorded['listing']]
+        if recorded['detail']:
+            cases['parse_recorded_details'] = lambda: [parse_job_details(html) for html in recorded['detail']]
+    return cases
+
+
+def load_cases(file_name):
+    cases = OrderedDict([
+        ('json_load', lambda: load_jobs(file_name)),
+    ])
+
+    # Plain dicts, as snapshots were loaded before job.Job
+    def json_load_dicts():
+        with open(file_name, 'r') as f:
+            return json.load(f)
+    cases['json_load_dicts'] = json_load_dicts
+
+    def json_loads_bytes():
+        with open(file_name, 'rb') as f:
+            return json.loads(f.read())
+    cases['json_loads_bytes'] = json_loads_bytes
+
+    # Optional faster parser, only benchmarked when installed
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        def orjson_loads():
+            with open(file_name, 'rb') as f:
+                return orjson.loads(f.read())
+        cases['orjson_loads'] = orjson_loads
+    return cases
+
+
+def search_cases(jobs):
+    index = JobIndex(jobs)
+    cases = OrderedDict([
+        ('index_build', lambda: JobIndex(jobs)),
+        ('scan_title', lambda: scan_title(jobs, 'developer')),
+    ])
+    for name, (method, *criteria) in SEARCHES.items():
+        cases[name] = (lambda method=method, criteria=criteria: getattr(index, method)(*criteria))
+    cases['run_batch'] = lambda: run_batch(index, BATCH_QUERIES)
+    return cases
+
+
+# Runs every benchmark and returns {'<group>/<scale>/<case>': stats}.
+# `recorded_archive` adds parsing cases on the pages of a --record archive.
+def run_suite(scales, data_dir, repeat=5, only=None, report=print, recorded_archive=None):
+    results = OrderedDict()
+
+    def run_group(prefix, cases):
+        for name, func in cases.items():
+            key = '{}/{}'.format(prefix, name)
+            if only and only not in key:
+                continue
+            results[key] = stats = measure(func, repeat)
+            report('{:45} median {:10.3f} ms   min {:10.3f} ms'.format(key, stats['median'] * 1000, stats['min'] * 1000))
+
+    recorded = None
+    if recorded_archive:
+        recorded = recorded_pages(recorded_archive)
+        report('Recorded pages from {}: {} listing, {} detail'.format(recorded_archive, len(recorded['listing']),
+            len(recorded['detail'])))
+    run_group('parse', parse_cases(recorded))
+
+    os.makedirs(data_dir, exist_ok=True)
+    for scale in scales:
+        details = scale <= LEAN_ABOVE
+        file_name = os.path.join(data_dir, 'synthetic_{}{}.json'.format(scale, '' if details else '_lean'))
+        write_snapshot(scale, file_name, details)
+        run_group('load/{}'.format(scale), load_cases(file_name))
+        run_group('search/{}'.format(scale), search_cases(load_jobs(file_name)))
+    return results
+
+
+# Compares results with a stored baseline and returns the regressions as
+# (key, baseline median, current median) tuples
+def compare(results, baseline, threshold):
+    regressions = []
+    for key, stats in results.items():
+        previous = baseline.get(key)
+        if previous and stats['median'] > previous['median'] * (1 + threshold):
+            regressions.append((key, previous['median'], stats['median']))
+    return regressions
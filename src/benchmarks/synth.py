@@ -0,0 +1,112 @@
+###
+#    Synthetic data for the benchmarks: job snapshots of any size built from
+#    the bundled brightermondayjobs_20230627-192110.json, plus listing and
+#    detail page html rendered with the markup the parser looks for.
+###
+
+from collections import OrderedDict
+from html import escape
+import json
+import os
+import random
+import uuid
+
+from parse import CATEGORY_CLASS, DATE_POSTED_CLASS, DETAILS_SECTION_CLASS, FEATURED_CLASS, \
+        LOCATION_TYPE_SALARY_CLASS, POSTER_CLASS, TITLE_LINK_CLASS
+
+SAMPLE_SNAPSHOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'brightermondayjobs_20230627-192110.json')
+
+SEED = 20230627
+
+# Extra variety for titles and locations so searches don't all hit the same
+# handful of values
+TITLE_PREFIXES = ['', 'Senior ', 'Junior ', 'Lead ', 'Graduate ', 'Principal ', 'Assistant ']
+LOCATIONS = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Remote (Work From Home)', 'Outside Kenya']
+PERIODS = ['hour', 'day', 'week', 'month']
+
+
+def load_sample():
+    with open(SAMPLE_SNAPSHOT, 'r') as f:
+        return json.load(f)
+
+
+# Generates `count` jobs shaped like the sample snapshot. The output only
+# depends on `count` and `seed`. With details=False the bulky Summary and
+# Description html is shortened, which keeps 1M-job files manageable.
+def generate_jobs(count, seed=SEED, details=True):
+    sample = load_sample()
+    rng = random.Random(seed)
+    jobs = []
+    for number in range(count):
+        base = sample[number % len(sample)]
+        job = OrderedDict()
+        job['ID'] = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        job['Title'] = rng.choice(TITLE_PREFIXES) + base['Title']
+        job['Link'] = '{}-{}'.format(base['Link'], number)
+        if details:
+            job['Summary'] = base['Summary']
+            job['Description'] = base['Description']
+        else:
+            job['Summary'] = base['Summary'][:200]
+            job['Description'] = base['Description'][:200]
+        job['Poster'] = base['Poster']
+        job['Location'] = rng.choice(LOCATIONS)
+        job['Type'] = base['Type']
+        job['Salary'] = base['Salary']
+        job['Category'] = base['Category']
+        amount = rng.randint(1, 11)
+        period = rng.choice(PERIODS)
+        job['Date_Posted'] = '{} {}{} ago'.format(amount, period, 's' if amount > 1 else '')
+        jobs.append(job)
+    return jobs
+
+
+# Writes a synthetic snapshot to `file_name` unless it already exists and
+# returns the file name
+def write_snapshot(count, file_name, details=True):
+    if not os.path.exists(file_name):
+        jobs = generate_jobs(count, details=details)
+        with open(file_name + '.tmp', 'w') as f:
+            json.dump(jobs, f)
+        os.replace(file_name + '.tmp', file_name)
+    return file_name
+
+
+def render_card(job, featured=False):
+    badge = ''
+    if featured:
+        badge = '<div class="{}"><span>FEATURED</span></div>'.format(FEATURED_CLASS)
+    return (
+        '<div data-cy="listing-cards-components"><div class="w-full">{badge}'
+        '<a class="{title_class}" href="{link}"><p>{title}</p></a>'
+        '<p class="{poster_class}">{poster}</p>'
+        '<div class="{location_class}"><span>{location}</span><span>{type}</span><span>{salary}</span></div>'
+        '<p class="{category_class}">Job Function : {category}</p>'
+        '</div><div class="{date_class}"><p>{date_posted}</p></div></div>'
+    ).format(
+        badge=badge,
+        title_class=TITLE_LINK_CLASS, link=escape(job['Link']), title=escape(job['Title']),
+        poster_class=POSTER_CLASS, poster=escape(job['Poster']),
+        location_class=LOCATION_TYPE_SALARY_CLASS, location=escape(job['Location']),
+        type=escape(job['Type']), salary=escape(job['Salary']),
+        category_class=CATEGORY_CLASS, category=escape(job['Category']),
+        date_class=DATE_POSTED_CLASS, date_posted=escape(job['Date_Posted']),
+    )
+
+
+# Renders a listing page with the given jobs, every `featured_every`-th one
+# marked as featured, and a link to the next page
+def render_listing_page(jobs, featured_every=5):
+    cards = ''.join(render_card(job, featured_every and number % featured_every == 0)
+            for number, job in enumerate(jobs, 1))
+    return ('<html><head><title>Jobs</title></head><body><main>{}</main>'
+            '<nav role="navigation"><div><a rel="next" href="?page=2">Next</a></div></nav>'
+            '</body></html>').format(cards)
+
+
+def render_detail_page(job):
+    return ('<html><head><title>{}</title></head><body><main>'
+            '<article class="job__details">{}{}<div class="{}"><h3>Apply</h3></div></article>'
+            '</main></body></html>').format(escape(job['Title']), job['Summary'], job['Description'],
+                    DETAILS_SECTION_CLASS)
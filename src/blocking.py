@@ -0,0 +1,141 @@
+###
+#    Resource blocking for the scraper's browser.
+#
+#    Listing and detail pages pull in images, fonts, analytics and ad scripts
+#    that the scraper never looks at. A blocking profile turns those off with
+#    Chrome content-setting prefs (browser wide, set when the driver starts)
+#    and DevTools URL blocking (per window, see apply_blocking()).
+#
+#    Page weight and load time are read from the browser's Performance API
+#    after every page load. Averages per profile are kept in a small stats
+#    file so a run can report what its profile saved compared to a run with
+#    nothing blocked ('none').
+###
+
+from collections import OrderedDict
+import json
+import os
+
+DEFAULT_BLOCK_PROFILE = 'standard'
+DEFAULT_BLOCKING_STATS = 'bmscraper_blocking_stats.json'
+
+MEDIA_PATTERNS = ('*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot', '*.mp4', '*.webm', '*.mp3')
+
+# Analytics, ads and session recording. The cookie consent banner
+# (cookielaw.org) must keep working, so it is not in here.
+TRACKER_PATTERNS = ('*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+        '*googlesyndication.com*', '*googleadservices.com*', '*adservice.google.*', '*facebook.net*',
+        '*facebook.com/tr*', '*hotjar.com*', '*clarity.ms*', '*linkedin.com/px*', '*snap.licdn.com*',
+        '*tiktok.com/i18n/pixel*', '*twitter.com/i/adsct*', '*criteo.*', '*taboola.com*')
+
+STYLE_PATTERNS = ('*.css',)
+
+# Profile name -> (DevTools URL patterns, Chrome content-setting prefs)
+BLOCK_PROFILES = OrderedDict([
+    ('none', ((), {})),
+    ('media', (MEDIA_PATTERNS, {
+        'profile.managed_default_content_settings.images': 2,
+    })),
+    ('standard', (MEDIA_PATTERNS + TRACKER_PATTERNS, {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.default_content_setting_values.notifications': 2,
+    })),
+    ('strict', (MEDIA_PATTERNS + TRACKER_PATTERNS + STYLE_PATTERNS, {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.default_content_setting_values.notifications': 2,
+    })),
+])
+
+# Load time of the current document and bytes it and its resources took
+# over the network (cached resources count as 0)
+PAGE_WEIGHT_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var bytes = nav ? nav.transferSize : 0;
+for (var i = 0; i < resources.length; i++) { bytes += resources[i].transferSize || 0; }
+return [nav ? nav.duration : 0, bytes, resources.length];
+"""
+
+
+def check_profile(profile):
+    if profile not in BLOCK_PROFILES:
+        raise ValueError('Blocking profile must be one of: {}'.format(', '.join(BLOCK_PROFILES)))
+    return profile
+
+
+# Adds the profile's content-setting prefs to ChromeOptions; must happen
+# before the driver starts
+def apply_prefs(options, profile):
+    prefs = BLOCK_PROFILES[check_profile(profile)][1]
+    if prefs:
+        options.add_experimental_option('prefs', dict(prefs))
+
+
+# Turns on DevTools URL blocking in the driver's current window. Every new
+# window needs its own call.
+def apply_blocking(driver, profile):
+    patterns = BLOCK_PROFILES[check_profile(profile)][0]
+    if not patterns:
+        return
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+
+
+# Returns (load seconds, bytes transferred, resource count) for the page
+# the driver is showing, or None if the browser couldn't tell
+def page_weight(driver):
+    try:
+        weight = driver.execute_script(PAGE_WEIGHT_SCRIPT)
+    except Exception:
+        return None
+    if not weight or len(weight) != 3:
+        return None
+    return weight[0] / 1000, int(weight[1]), int(weight[2])
+
+
+def format_bytes(count):
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(count) < 1024:
+            return '{:.1f} {}'.format(count, unit)
+        count /= 1024
+    return '{:.1f} GiB'.format(count)
+
+
+class BlockingStats:
+    """ Page loads, bytes and load time per blocking profile across runs
+        Logic: Savings are the difference between a profile's per-page
+        averages and those of the 'none' profile
+    """
+
+    def __init__(self, file_name=DEFAULT_BLOCKING_STATS):
+        self.file_name = file_name
+        self.profiles = OrderedDict()
+        if os.path.exists(file_name):
+            with open(file_name, 'r') as f:
+                self.profiles = json.load(f, object_pairs_hook=OrderedDict)
+
+    def record(self, profile, pages, bytes_transferred, load_seconds):
+        totals = self.profiles.setdefault(profile, OrderedDict([('pages', 0), ('bytes', 0), ('load_seconds', 0.0)]))
+        totals['pages'] += pages
+        totals['bytes'] += bytes_transferred
+        totals['load_seconds'] += load_seconds
+
+    def averages(self, profile):
+        totals = self.profiles.get(profile)
+        if not totals or not totals['pages']:
+            return None
+        return totals['bytes'] / totals['pages'], totals['load_seconds'] / totals['pages']
+
+    # Per-page (bytes, seconds) saved by `profile` compared to blocking
+    # nothing, or None until both have been measured
+    def savings(self, profile):
+        baseline, current = self.averages('none'), self.averages(profile)
+        if baseline is None or current is None:
+            return None
+        return baseline[0] - current[0], baseline[1] - current[1]
+
+    def save(self):
+        with open(self.file_name + '.tmp', 'w') as f:
+            json.dump(self.profiles, f, indent=2)
+        os.replace(self.file_name + '.tmp', self.file_name)
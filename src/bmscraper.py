@@ -7,531 +7,548 @@
 #    Author: Victor Paul 'dekar'
 ###
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
-from bs4 import BeautifulSoup
-from time import sleep
-from datetime import datetime
-from collections import OrderedDict
+# Only what the argument parser and the search modes need is imported here;
+# the scraping stack (selenium, bs4, the fetchers) is imported in scrape.py,
+# once a scrape is actually asked for
+from time import sleep, perf_counter
 from argparse import ArgumentParser
-import urllib.request
-import urllib.error
 import json
 import os
 import re
-import uuid
 
-BASE_URL = 'https://brightermonday.co.ke/'
-JOBS_URL = BASE_URL + 'jobs/it-telecoms'
-
-
-# json file name regex
-# '^(brightermondayjobs)\_[0-9]{8,8}\-[0-9]{6,6}\.(json)$'
-# Matches, e.g. brightermondayjobs_20161114-103302.json
-
-class BrighterMondayJobsScraper:
-    """ Scrapes and stores all job listings from brightermonday.co.ke into a file as json objects
-        Logic: The data will be ready for consumption by programs written in other languages
-        apart from Python
-    """
-
-    def __init__(self, pages = 5):
-        self.pages = pages
-
-    # Will be toggled accordingly in case of errors while scraping for data
-    scraping_error = False
-
-    # Init selenium
-    options = webdriver.ChromeOptions()
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    # options.add_argument('--headless')
-
-    driver = webdriver.Chrome(options=options, service=Service(ChromeDriverManager().install()))
-    driver.set_window_size(1366, 768)
-    driver.implicitly_wait(5)
-
-    # The app's awesome main menu
-    uiWindow = """
-    ----------------------------------------------------------------------------------------
-    Brighter Monday Jobs Scraper
+from blocking import BLOCK_PROFILES, DEFAULT_BLOCK_PROFILE, DEFAULT_BLOCKING_STATS
+from categories import DEFAULT_CATEGORY
+from checkpoint import DEFAULT_CHECKPOINT
+from detailmemo import DEFAULT_DETAIL_MEMO
+from driverpath import DRIVER_PATH_ENV
+from httpcache import DEFAULT_HTTP_CACHE
+from pagecache import DEFAULT_PAGE_CACHE
+from prefetch import PREFETCH_BACKENDS
+from profiling import PROFILE_MODES, Profiler
+from resultcache import ResultCache
+from session import DEFAULT_SESSION
+from search import JobIndex, date_posted_regexp, load_queries, load_snapshots, run_batch, search_snapshots
+from store import expand_snapshot_paths, load_jobs, to_json
+
+# The app's awesome main menu
+MAIN_MENU = """
+----------------------------------------------------------------------------------------
+Brighter Monday Jobs Scraper
+Version: 1.0
+----------------------------------------------------------------------------------------
+Main Menu
+
+[1] Scrape
+[2] Search
+[3] Exit
+"""
+
+
+# `from bmscraper import BrighterMondayJobsScraper` keeps working, without
+# making every import of this module load the scraper
+def __getattr__(name):
+    if name in ('BASE_URL', 'JOBS_URL', 'BrighterMondayJobsScraper'):
+        import scrape
+        return getattr(scrape, name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+# Loads and indexes given json file(s) once, then answers any number of
+# searches against them until the user exits
+def search_scraped_jobs(file_names, cache_dir=None, workers=None):
+
+    # The app's awesome search menu
+    search_menu = """
+    Brighter Monday Jobs Search 
     Version: 1.0
     ----------------------------------------------------------------------------------------
-    Main Menu
-
-    [1] Scrape
-    [2] Search
-    [3] Exit
-    """
-
-    # The main scraping function
-    def scrape_jobs(self):
-        self.driver.get(JOBS_URL)
-
-        # wait for page to load, check for the cookie consent section
-        # and programmatically click the agree button
-
-        if self.driver.find_element(By.ID, 'onetrust-accept-btn-handler'):
-            print('>>> Found cookie agree button')
-            cookie_agree_button = self.driver.find_element(By.ID, 'onetrust-accept-btn-handler')
-            cookie_agree_button.click()
-            print('>>> Cookie agree button clicked. Waiting for 5 seconds to begin scraping...')
-            sleep(5);
-
-        # Array to store scraped jobs as Collections.OrderedDict
-        jobs = []
-
-        # Helps keep track of the next page value
-        next_page = 2
-
-        while True:
-            try:
-                current_page = next_page - 1
-
-                # Stop scraping after given number of pages, default = 5
-                if current_page == self.pages + 1:
-                    break
-
-                soup = BeautifulSoup(self.driver.page_source, 'lxml')
-                job_sections = soup.find_all(attrs={"data-cy": "listing-cards-components"})
-
-                for job_section in job_sections:
-
-                    # Skip featured jobs
-                    try:
-                        if job_section.find('div', class_='flex flex-shrink-0 justify-center items-center w-5 text-xs font-medium text-white uppercase rounded-l-md rounded-bl-none bg-brand-secondary').span.text.strip() == 'FEATURED':
-                            print('>>> Skipping featured job')
-                            continue
-                    except AttributeError:
-                        pass
-
-                    # We use Python's OrderedDict data structure to store and retrieve data in the order
-                    # they are stored, unlike the in traditional dictionary
-                    job = OrderedDict()
-
-                    # Generate UUID for the job
-                    job['ID'] = str(uuid.uuid4())
-
-                    if job_section.find('a', class_="relative mb-3 text-lg font-medium break-words focus:outline-none metrics-apply-now text-link-500 text-loading-animate"):
-                        job['Title'] = job_section.find('a', class_="relative mb-3 text-lg font-medium break-words focus:outline-none metrics-apply-now text-link-500 text-loading-animate").p.text.strip()
-                        job['Link'] = job_section.find('a', class_="relative mb-3 text-lg font-medium break-words focus:outline-none metrics-apply-now text-link-500 text-loading-animate")['href']
-                        # use selenium to launch another window to fetch content from the job link
-                        # and extract job summary and job description
-                        # then close the window
-                        try:
-                            self.driver.execute_script("window.open('');")
-                            self.driver.switch_to.window(self.driver.window_handles[1])
-                            self.driver.get(job['Link'])
-                            job_soup = BeautifulSoup(self.driver.page_source, 'lxml')
-                            job_summary_desc = job_soup.find('article', class_='job__details')
-                            # find job summary and job description in the job details section
-                            # and store them in the job dict
-                            # if not found, store 'No summary available' and 'No description available'
-                            # respectively
-                            job_summary_desc_list = job_summary_desc.find_all('div', class_='py-5 px-4 border-b border-gray-300 md:p-5')
-                            if job_summary_desc_list[0].h3.text.strip() == 'Job Summary':
-                                job['Summary'] = str(job_summary_desc_list[0])
-                            else:
-                                job['Summary'] = 'No summary available'
-                            if "Job Description" in job_summary_desc_list[1].h3.text.strip():
-                                job['Description'] = str(job_summary_desc_list[1])
-                            else:
-                                job['Description'] = 'No description available'
-                            # job['Description'] = job_summary_desc.text.strip()
-                            self.driver.close()
-                            self.driver.switch_to.window(self.driver.window_handles[0])
-                        except Exception as e:
-                            print('>>> Error fetching job summary and description')
-                            print(e)
-                            job['Summary'] = 'No summary available'
-                            job['Description'] = 'No description available'
-                    else:
-                        job['Title'] = 'No title provided'
-                        job['Link'] = 'No link available'
-
-                    if job_section.find('p', class_='text-sm text-link-500'):
-                        job_poster = job_section.find('p', class_='text-sm text-link-500').text.strip()
-                        job['Poster'] = job_poster
-                    else:
-                        job['Poster'] = 'No job poster found'
-
-                    if job_section.find('div', class_='flex flex-wrap mt-3 text-sm text-gray-500 md:py-0'):
-                        job_location_type_salary = job_section.find('div', class_='flex flex-wrap mt-3 text-sm text-gray-500 md:py-0')
-                        job_location_type_salary = job_location_type_salary.find_all('span')
-                        job['Location'] = job_location_type_salary[0].text.strip()
-                        job['Type'] = job_location_type_salary[1].text.strip()
-                        job['Salary'] = job_location_type_salary[2].text.strip()
-
-                    if job_section.find('p', class_='text-sm text-gray-500 text-loading-animate inline-block'):
-                        job_category = job_section.find('p', class_='text-sm text-gray-500 text-loading-animate inline-block').text.strip()
-                        job['Category'] = job_category.split(":")[1].strip()
-                    else:
-                        job['Category'] = 'Category not provided'
-
-                    if job_section.find('div', class_='flex flex-row items-start items-center px-5 py-3 w-full border-t border-gray-300'):
-                        date_posted = job_section.find('div',
-                                class_='flex flex-row items-start items-center px-5 py-3 w-full border-t border-gray-300').p.text.strip()
-                        job['Date_Posted'] = date_posted
-                    else:
-                        job['Date_Posted'] = 'Date posted not provided'
-
-                    # Add scraped data to `jobs` array
-                    jobs.append(job)
-                print("Scraped page {!s}".format(current_page))
-
-                # Check if we have a next page
-                try:
-                    next_page_elem = self.driver.find_element(By.XPATH, value="//nav[@role='navigation']/div/a[@rel='next']")
-                    # Navigate to next page if we still have more pages to
-                    # scrape
-                    if next_page_elem and (current_page < self.pages):
-                        # next_page_elem.click()
-                        print('>>> Navigating to next page and waiting for page to load...')
-                        self.driver.get(JOBS_URL + '?page=' + str(next_page))
-                        next_page += 1
-                        sleep(5) # wait for 1 second before scraping next page
-                    else:
-                        break
-                except NoSuchElementException:
-                    print('No other pages found. Finishing scraping job.')
-                    break
-
-            except:
-                self.scraping_error = True
-                print('<<< An error occured. Jobs saved so far will still be available for you to see >>>')
-                break
+    Search Menu
 
-        return jobs
+    Search scraped jobs by:
+    [1] Job Title
+    [2] Location
+    [3] Company
+    [4] Date posted ['1 day ago', '2 weeks ago', '1 hour' and so on]
+    [5] I feel lucky [search by all four criteria]
+    [6] Exit
 
-    def scrape(self):
-        print('Beginning scraping operation...')
-        print('Scraping {} pages...'.format(self.pages))
+    """
 
-        jobs = self.scrape_jobs()
-        # Report final status of scraping operation
-        if self.scraping_error:
-            print('Scraping completed but with some errors.')
+    def print_jobs(title, category, location, poster, type_, salary, link,
+            date_posted):
+        # The job posted date is stored as '2h', '1d', '5w', etc
+        # So we split the time-count and period indicator using
+        # Python's awesome list splitting magic and
+        # save the print out the date as '2 hour(s)' '1 day(s)', '5 week(s)', etc
+        time_count = re.findall(r'\d+', date_posted.lower(), re.IGNORECASE)[0]
+        period_indicator = re.findall(r'[a-z]+', date_posted.lower(), re.IGNORECASE)[0]
+        period_indicator_full = ''
+        if period_indicator == 'm':
+            period_indicator_full = 'minute(s)'
+        elif period_indicator == 'h':
+           period_indicator_full = 'hour(s)'
+        elif period_indicator == 'd':
+           period_indicator_full = 'day(s)'
+        elif period_indicator == 'w':
+            period_indicator_full = 'week(s)'
+        elif period_indicator == 'mo':
+            period_indicator_full = 'month(s)'
         else:
-            print('Scraping completed successfully.')
-
-        total_jobs = len(jobs)
-        print('Scraped job listings = {} jobs'.format(total_jobs))
+            period_indicator_full = period_indicator
+        date_posted = '{} {} ago'.format(time_count, period_indicator_full)
+
+        print('{:20} : {}'.format('Title', title))
+        print('{:20} : {}'.format('Category', category))
+        print('{:20} : {}'.format('Location', location))
+        print('{:20} : {}'.format('Posted by', poster))
+        print('{:20} : {}'.format('Type', type_))
+        print('{:20} : {}'.format('Salary', salary))
+        print('{:20} : {}'.format('Link', link))
+        print('{:20} : {}'.format('Date Posted', date_posted))
+        print()
 
-        # Save jobs to file
-        file_name = 'brightermondayjobs_{}.json'.format(datetime.now().strftime('%Y%m%d-%H%M%S'))
-        print('Saving to file: {}'.format(file_name))
-        with open(file_name, 'w') as f:
-            json.dump(jobs, f)
+    # Load data from json file(s) once and keep it indexed in memory for
+    # the whole search session
+    cache = ResultCache(cache_dir=cache_dir)
+    try:
+        index = load_snapshots(file_names, workers, cache)
+    except ValueError as e:
+        print('<<< Could not load job listings: {} >>>'.format(e))
+        return
+
+    def print_results(jobs, no_match_message='No matches found. Sorry.'):
+        for job in jobs:
+            print_jobs(
+                job['Title'],
+                job['Category'],
+                job['Location'],
+                job['Poster'],
+                job['Type'],
+                job['Salary'],
+                job['Link'],
+                job['Date_Posted'],
+            )
+        print('Total jobs found: {}'.format(len(jobs)))
+        if not jobs:
+            print(no_match_message)
+
+    # Runs a search against the warm index and reports how long it took
+    def run_query(search, *criteria, no_match_message='No matches found. Sorry.'):
+        started = perf_counter()
+        results = search(*criteria)
+        elapsed = perf_counter() - started
+        print_results(results, no_match_message)
+        print('Query took {:.3f} ms'.format(elapsed * 1000))
 
-        # Optional: Print jobs to screen
+    while True:
+        os.system('clear')
+        print(search_menu)
+        print('Job listings file: {!s}'.format(index.file_name))
+        print('Total jobs in file: {!s}'.format(len(index)))
         print()
-        print_jobs_to_screen = input('Print jobs to screen? [Y]es or [N]o: ')
-        if print_jobs_to_screen.lower() in ['y', 'yes', 'yeah']:
-            jobs_to_print = input('Enter number of jobs to print (Total Jobs = {}): '.format(total_jobs))
-            jobs_to_print = int(jobs_to_print)
-            # Print out the jobs
-            for job in jobs[:jobs_to_print]:
-                for k, v in job.items():
-                    print('{:10} : {}'.format(k, v))
+        search_menu_option = input('Option: ')
+        if search_menu_option == '1':
+            title_name = input('Enter job title: ')
+            print()
+            run_query(index.search_by_title, title_name)
+        elif search_menu_option == '2':
+            location_name = input('Enter location: ')
+            print()
+            run_query(index.search_by_location, location_name)
+        elif search_menu_option == '3':
+            company_name = input('Enter company name: ')
+            print()
+            run_query(index.search_by_postedby, company_name)
+        elif search_menu_option == '4':
+            date_posted = input('Enter date posted: ')
+            if date_posted_regexp.search(date_posted):
                 print()
-
-            print('-----------------------------------------')
-            print('Done.')
-            print('-----------------------------------------')
-        elif print_jobs_to_screen.lower() in ['n', 'no', 'nope']:
-            print('Ok. Bye.')
-        else:
-            print('Wrong input. Exiting.')
-
-    # Loads and searches given json file for matching job listings
-    def search_scraped_jobs(self, file_name):
-
-        # The app's awesome search menu
-        search_menu = """
-        Brighter Monday Jobs Search 
-        Version: 1.0
-        ----------------------------------------------------------------------------------------
-        Search Menu
-
-        Search scraped jobs by:
-        [1] Job Title
-        [2] Location
-        [3] Company
-        [4] Date posted ['1 day ago', '2 weeks ago', '1 hour' and so on]
-        [5] I feel lucky [search by all four criteria]
-        [6] Exit
-
-        """
-
-        # Regular expression to make sure user-provided string is within
-        # expectations.
-        # Matches patterns like '1 day ago', '4 weeks ago', '5 minutes'...
-        date_posted_regexp = re.compile(r'^\d+\s+(minute|hour|day|week|month)s?\s?(ago)?$',
-                re.IGNORECASE)
-
-        def print_jobs(title, category, location, poster, type_, salary, link,
-                date_posted):
-            # The job posted date is stored as '2h', '1d', '5w', etc
-            # So we split the time-count and period indicator using
-            # Python's awesome list splitting magic and
-            # save the print out the date as '2 hour(s)' '1 day(s)', '5 week(s)', etc
-            time_count = re.findall(r'\d+', date_posted.lower(), re.IGNORECASE)[0]
-            period_indicator = re.findall(r'[a-z]+', date_posted.lower(), re.IGNORECASE)[0]
-            period_indicator_full = ''
-            if period_indicator == 'm':
-                period_indicator_full = 'minute(s)'
-            elif period_indicator == 'h':
-               period_indicator_full = 'hour(s)'
-            elif period_indicator == 'd':
-               period_indicator_full = 'day(s)'
-            elif period_indicator == 'w':
-                period_indicator_full = 'week(s)'
-            elif period_indicator == 'mo':
-                period_indicator_full = 'month(s)'
+                run_query(index.search_by_date_posted, date_posted)
             else:
-                period_indicator_full = period_indicator
-            date_posted = '{} {} ago'.format(time_count, period_indicator_full)
-
-            print('{:20} : {}'.format('Title', title))
-            print('{:20} : {}'.format('Category', category))
-            print('{:20} : {}'.format('Location', location))
-            print('{:20} : {}'.format('Posted by', poster))
-            print('{:20} : {}'.format('Type', type_))
-            print('{:20} : {}'.format('Salary', salary))
-            print('{:20} : {}'.format('Link', link))
-            print('{:20} : {}'.format('Date Posted', date_posted))
-            print()
+                print('Please enter the date posted as {}'.\
+                        format('[1 day ago, 2 weeks ago, 2 hours, and so on]'))
+        elif search_menu_option == '5':
+            title_name = input('Enter job title: ')
+            location_name = input('Enter location: ')
+            company_name = input('Enter company name: ')
+            date_posted = input('Enter date posted: ')
+            if date_posted_regexp.search(date_posted):
+                print()
+                run_query(index.search_by_all, title_name, location_name, company_name, date_posted,
+                        no_match_message='No matches found. It appears you weren\'t so lucky.')
+            else:
+                print('Please enter the date posted as {}'.\
+                        format('[1 day ago, 2 weeks ago, 2 hours, and so on]'))
+        elif search_menu_option == '6':
+            print('Result cache: {hits} hits ({disk_hits} from disk), {misses} misses'.format(**cache.stats()))
+            break
+        else:
+            print('Wrong option.')
+            sleep(2)
+            continue
+
+        # Keep the results on screen until the user is ready for the
+        # next query
+        print()
+        input('Press Enter to search again...')
 
+if __name__ == '__main__':
 
-        # Compares user-provided date string and values from the file
-        # We have to strip some characters from the user-provided string
-        # since the string we're comparing it to is like '1d', '3h', and so on
-        # Returns true if they match, false otherwise
-        def compare_dates(date_1, date_2):
-            date_1 = date_1.lower()
-            date_1 = date_1.split(' ');
-            time_count = date_1[0]
-            period_indicator = ''
-            # if the user entered 'month[s]' we have to make sure we've
-            # extracted 'mo' from the string
-            if date_1[1] in 'months':
-                period_indicator = date_1[1][:2]
+    # Initialize the app's argument parser
+    parser = ArgumentParser()
+    parser.add_argument('-p', '--pages', help='Specify how many pages to scrape')
+    parser.add_argument('-f', '--file', nargs='+', help='Specify json file(s) with job listings; folders '
+            'and glob patterns such as "brightermondayjobs_202306*.json" are accepted too')
+    parser.add_argument('--categories', help='Comma-separated job categories to scrape side by side, e.g. '
+            '"it-telecoms,sales", or "all" for every category listed on the site (default: {})'.format(DEFAULT_CATEGORY))
+    parser.add_argument('--category-workers', type=int, help='Categories scraped at the same time, each in its '
+            'own browser (default: all of them)')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted scrape from its checkpoint')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help='Checkpoint file for scrape progress '
+            '(default: {})'.format(DEFAULT_CHECKPOINT))
+    parser.add_argument('--checkpoint-every', type=int, default=1, help='Save the checkpoint every N pages '
+            '(default: 1)')
+    parser.add_argument('--retries', type=int, default=4, help='Attempts per listing or detail page before '
+            'it is given up on (default: 4)')
+    parser.add_argument('--retry-delay', type=float, default=1.0, help='Base delay in seconds for exponential '
+            'backoff between retries (default: 1)')
+    parser.add_argument('--http-details', action='store_true', help='Fetch job detail pages over plain HTTP '
+            'instead of opening a browser window per job')
+    parser.add_argument('--http-cache', default=DEFAULT_HTTP_CACHE, help='File keeping ETag/Last-Modified '
+            'validators and extracted details for --http-details, "none" to always download '
+            '(default: {})'.format(DEFAULT_HTTP_CACHE))
+    parser.add_argument('--detail-memo', default=DEFAULT_DETAIL_MEMO, help='File keeping detail page '
+            'extractions by content hash, "none" to always parse (default: {})'.format(DEFAULT_DETAIL_MEMO))
+    parser.add_argument('--prefetch', type=int, default=0, metavar='N', help='Fetch the next N listing pages in '
+            'the background while the current one is processed (default: 0, off)')
+    parser.add_argument('--prefetch-with', choices=PREFETCH_BACKENDS, default='http', help='Prefetch listing '
+            'pages over plain HTTP or in a second browser (default: http)')
+    parser.add_argument('--rate', type=float, default=1.0, help='Requests per second to start at; the rate '
+            'adapts to how the site responds (default: 1)')
+    parser.add_argument('--min-rate', type=float, default=0.1, help='Slowest request rate to back off to '
+            '(default: 0.1)')
+    parser.add_argument('--max-rate', type=float, default=5.0, help='Fastest request rate to speed up to '
+            '(default: 5)')
+    parser.add_argument('--block', choices=BLOCK_PROFILES, default=DEFAULT_BLOCK_PROFILE, help='Resources the '
+            'browser skips: none, media (images, fonts, video), standard (media and trackers) or strict '
+            '(standard and stylesheets) (default: {})'.format(DEFAULT_BLOCK_PROFILE))
+    parser.add_argument('--blocking-stats', default=DEFAULT_BLOCKING_STATS, help='File tracking page weight per '
+            'blocking profile across runs (default: {})'.format(DEFAULT_BLOCKING_STATS))
+    parser.add_argument('--show-browser', action='store_true', help='Run Chrome with a visible window instead '
+            'of headless')
+    parser.add_argument('--recycle-pages', type=int, default=100, help='Restart the browser every N listing '
+            'pages, 0 to never (default: 100)')
+    parser.add_argument('--max-browser-mb', type=int, default=1536, help='Restart the browser once it uses more '
+            'memory than this, 0 for no limit (default: 1536)')
+    parser.add_argument('--chromedriver', metavar='PATH', help='ChromeDriver executable to use, e.g. on hosts '
+            'without internet access (default: ${} if set, else the cached or downloaded driver)'.format(
+                DRIVER_PATH_ENV))
+    parser.add_argument('--driver-cache', help='File caching the ChromeDriver path per Chrome version '
+            '(default: ~/.cache/bmscraper/chromedriver.json)')
+    parser.add_argument('--session', default=DEFAULT_SESSION, help='File keeping cookies and cookie consent '
+            'between runs (default: {})'.format(DEFAULT_SESSION))
+    parser.add_argument('--fresh-session', action='store_true', help='Ignore and replace the saved session '
+            'and clear the browser profile\'s cookies, going through the cookie consent again')
+    parser.add_argument('--browser-profile', default='bmscraper_browser_profile', help='Persistent Chrome '
+            'profile folder, so static assets come from disk cache; "none" for a throwaway profile '
+            '(default: bmscraper_browser_profile)')
+    parser.add_argument('--page-cache', default=DEFAULT_PAGE_CACHE, help='Folder keeping every fetched page, '
+            '"none" to keep nothing (default: {})'.format(DEFAULT_PAGE_CACHE))
+    parser.add_argument('--reparse', action='store_true', help='Extract jobs from the pages in --page-cache '
+            'instead of the site and save them as a new snapshot')
+    parser.add_argument('--record', nargs='?', const='', metavar='FILE', help='Record every fetch of the '
+            'scrape into a WARC-style archive (default: brightermondayjobs_<timestamp>.warc.gz)')
+    parser.add_argument('--replay', metavar='FILE', help='Run a scrape against a recorded archive instead of '
+            'the site, with no browser and no waiting')
+    parser.add_argument('--daemon', action='store_true', help='Keep running and scrape new jobs on a schedule '
+            '(--interval or --cron) instead of showing the menu; stop with SIGTERM')
+    parser.add_argument('--interval', type=float, default=3600, help='Seconds between --daemon runs '
+            '(default: 3600)')
+    parser.add_argument('--cron', metavar='EXPR', help='Run --daemon scrapes on a cron schedule instead, e.g. '
+            '"*/30 7-19 * * 1-5"')
+    parser.add_argument('--store', default='.', help='Folder --daemon saves snapshots to, and reads the jobs '
+            'already scraped from (default: current folder)')
+    parser.add_argument('-r', '--report', help='Write a json report of per-stage scrape timings to this file')
+    parser.add_argument('--metrics-file', help='Write Prometheus metrics for the textfile collector to this '
+            'file at the end of a scrape')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics on this port at /metrics '
+            'while scraping')
+    parser.add_argument('--profile', choices=PROFILE_MODES, help='Profile the scrape or search run with '
+            'cProfile (cpu) or tracemalloc (mem)')
+    parser.add_argument('--profile-out', help='Where to write the profile report (default: '
+            'bmscraper_profile_<mode>_<timestamp>.txt)')
+    parser.add_argument('--profile-top', type=int, default=25, help='Number of functions or allocation '
+            'sites to report (default: 25)')
+    parser.add_argument('-w', '--workers', type=int, help='Number of processes used to load and search '
+            'several files (default: one per CPU)')
+    parser.add_argument('-b', '--batch', help='Run the saved searches in this json file against --file '
+            'without the interactive menu')
+    parser.add_argument('-o', '--output', help='Write batch results to this json file instead of the screen')
+    parser.add_argument('--cache-dir', help='Keep search results cached in this folder across runs')
+    parser.add_argument('--serve', metavar='[HOST:]PORT', help='Serve searches over HTTP from --file '
+            '(snapshots or folders of snapshots, default: current folder)')
+    args = parser.parse_args()
+
+    # Resolve folders and patterns to the actual snapshot files
+    file_names = expand_snapshot_paths(args.file) if args.file else []
+    if args.file and not file_names and not args.serve:
+        parser.error('No job listings files found for: {}'.format(' '.join(args.file)))
+
+    # Search API server mode
+    if args.serve:
+        host, _, port = args.serve.rpartition(':')
+        if not port.isdigit():
+            parser.error('--serve expects a port number, e.g. 8080 or 0.0.0.0:8080')
+        from server import serve
+        serve(args.file or ['.'], host or '127.0.0.1', int(port), args.cache_dir)
+        raise SystemExit(0)
+
+    profiler = None
+    if args.profile:
+        profiler = Profiler(args.profile, args.profile_out, args.profile_top)
+
+    # Non-interactive batch mode: evaluate all saved searches in one pass
+    if args.batch:
+        if not args.file:
+            parser.error('--batch needs a job listings file, see --file')
+        try:
+            queries = load_queries(args.batch)
+        except ValueError as e:
+            parser.error(str(e))
+        cache = ResultCache(cache_dir=args.cache_dir)
+        if profiler is not None:
+            profiler.start()
+        try:
+            if len(file_names) == 1:
+                results = run_batch(JobIndex.from_file(file_names[0], cache), queries)
             else:
-                period_indicator = date_1[1][:1]
-            new_date_1 = '{}{}'.format(time_count, period_indicator)
-
-            return (new_date_1 == date_2)
-
-        # Load data from json file
-        jobs = []
-        with open(file_name, 'r') as f:
-            jobs = json.load(f)
-
-        def search_by_title(title):
-            match_found = False
-            jobs_ = jobs
-            job_count = 0
-
-            for job in jobs_:
-                if title.lower() in job['Title'].lower():
-                    match_found = True
-                    job_count += 1
-                    print_jobs(
-                        job['Title'],
-                        job['Category'],
-                        job['Location'],
-                        job['Poster'],
-                        job['Type'],
-                        job['Salary'],
-                        job['Link'],
-                        job['Date_Posted'],
-                    )
-            print('Total jobs found: {}'.format(job_count))
-            if not match_found:
-                print('No matches found. Sorry.')
-
-        def search_by_location(location):
-            match_found = False
-            jobs_ = jobs
-            job_count = 0
-
-            for job in jobs_:
-                if location.lower() in job['Location'].lower():
-                    match_found = True
-                    job_count += 1
-                    print_jobs(
-                        job['Title'],
-                        job['Category'],
-                        job['Location'],
-                        job['Poster'],
-                        job['Type'],
-                        job['Salary'],
-                        job['Link'],
-                        job['Date_Posted'],
-                    )
-            print('Total jobs found: {}'.format(job_count))
-            if not match_found:
-                print('No matches found. Sorry.')
-
-        def search_by_postedby(poster):
-            match_found = False
-            jobs_ = jobs
-            job_count = 0
-
-            for job in jobs_:
-                if poster.lower() in job['Poster'].lower():
-                    match_found = True
-                    job_count += 1
-                    print_jobs(
-                        job['Title'],
-                        job['Category'],
-                        job['Location'],
-                        job['Poster'],
-                        job['Type'],
-                        job['Salary'],
-                        job['Link'],
-                        job['Date_Posted'],
-                    )
-            
-            print('Total jobs found: {}'.format(job_count))
-            if not match_found:
-                print('No matches found. Sorry.')
-
-        def search_by_date_posted(date_posted):
-            match_found = False
-            jobs_ = jobs
-            job_count = 0
-
-            for job in jobs_:
-                if compare_dates(date_posted.lower(), job['Date_Posted'].lower()):
-                    match_found = True
-                    job_count += 1
-                    print_jobs(
-                        job['Title'],
-                        job['Category'],
-                        job['Location'],
-                        job['Poster'],
-                        job['Type'],
-                        job['Salary'],
-                        job['Link'],
-                        job['Date_Posted'],
-                    )
-            
-            print('Total jobs found: {}'.format(job_count))
-            if not match_found:
-                print('No matches found. Sorry.')
-
-        def search_by_all(title, location, poster, date_posted):
-            match_found = False
-            jobs_ = jobs
-            job_count = 0
-
-            # TODO: Implement regex for date_posted search
-            for job in jobs_:
-                if (title.lower() in job['Title'].lower()) and (location.lower() in job['Location'].lower()) \
-                        and (poster.lower() in job['Poster'].lower() and
-                                compare_dates(date_posted.lower(), job['Date_Posted'].lower())):
-                    match_found = True
-                    job_count += 1
-                    print_jobs(
-                        job['Title'],
-                        job['Category'],
-                        job['Location'],
-                        job['Poster'],
-                        job['Type'],
-                        job['Salary'],
-                        job['Link'],
-                        job['Date_Posted'],
-                    )
-            print('Total jobs found: {}'.format(job_count))
-            if not match_found:
-                print('No matches found. It appears you weren\'t so lucky.')
+                # Spread loading and matching over worker processes, one file each
+                results = search_snapshots(file_names, queries, args.workers)
+        except ValueError as e:
+            parser.error(str(e))
+        if profiler is not None:
+            profiler.stop()
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, default=to_json)
+            print('Saved results of {} searches over {} file(s) to file: {}'.format(
+                len(results), len(file_names), args.output))
+            if len(file_names) == 1:
+                print('Result cache: {hits} hits ({disk_hits} from disk), {misses} misses'.format(**cache.stats()))
+        else:
+            print(json.dumps(results, indent=2, default=to_json))
+        raise SystemExit(0)
 
+    # The main menu, unless the run is unattended
+    if not (args.daemon or args.reparse or args.replay):
         while True:
             os.system('clear')
-            print(search_menu)
-            print('Job listings file: {!s}'.format(file_name))
-            print('Total jobs in file: {!s}'.format(len(jobs)))
-            print()
-            search_menu_option = input('Option: ')
-            if search_menu_option == '1':
-                title_name = input('Enter job title: ')
-                print()
-                search_by_title(title_name)
-                break
-            elif search_menu_option == '2':
-                location_name = input('Enter location: ')
-                print()
-                search_by_location(location_name)
-                break
-            elif search_menu_option == '3':
-                company_name = input('Enter company name: ')
-                print()
-                search_by_postedby(company_name)
-                break
-            elif search_menu_option == '4':
-                date_posted = input('Enter date posted: ')
-                if date_posted_regexp.search(date_posted):
-                    print()
-                    search_by_date_posted(date_posted)
-                else:
-                    print('Please enter the date posted as {}'.\
-                            format('[1 day ago, 2 weeks ago, 2 hours, and so on]'))
+            print(MAIN_MENU)
+            main_menu_option = input('Option: ')
+            if main_menu_option == '1':
                 break
-            elif search_menu_option == '5':
-                title_name = input('Enter job title: ')
-                location_name = input('Enter location: ')
-                company_name = input('Enter company name: ')
-                date_posted = input('Enter date posted: ')
-                if date_posted_regexp.search(date_posted):
-                    print()
-                    search_by_all(title_name, location_name, company_name, date_posted)
+            elif main_menu_option == '2':
+                # set the file to load and search, if provided
+                if file_names:
+                    if profiler is not None:
+                        with profiler:
+                            search_scraped_jobs(file_names, args.cache_dir, args.workers)
+                    else:
+                        search_scraped_jobs(file_names, args.cache_dir, args.workers)
                 else:
-                    print('Please enter the date posted as {}'.\
-                            format('[1 day ago, 2 weeks ago, 2 hours, and so on]'))
-                break
-            elif search_menu_option == '6':
-                break
+                    print("You didn't specify a file to search. Please see the help options")
+                raise SystemExit(0)
+            elif main_menu_option == '3':
+                print('Exiting.')
+                raise SystemExit(0)
             else:
                 print('Wrong option.')
                 sleep(2)
-                break
 
-if __name__ == '__main__':
-
-    # Initialize the app's argument parser
-    parser = ArgumentParser()
-    parser.add_argument('-p', '--pages', help='Specify how many pages to scrape')
-    parser.add_argument('-f', '--file', help='Specify json file with job listings')
-    args = parser.parse_args()
+    # Everything below scrapes, so this is where the scraping stack is
+    # imported
+    from collections import OrderedDict
+    from datetime import datetime
+
+    from archive import ArchiveWriter, ReplaySource, default_archive_name
+    from blocking import BlockingStats
+    from categories import SeenLinks, category_url, parse_categories
+    from checkpoint import Checkpoint
+    from daemon import CronSchedule, IntervalSchedule, ScrapeDaemon
+    from detailmemo import DetailMemo
+    from driver import DriverManager
+    from driverpath import DriverResolver
+    from fetch import HttpFetcher
+    from httpcache import DetailCache
+    from instrument import Instrumentation
+    from metrics import ScrapeMetrics, serve_metrics
+    from pagecache import PageCache
+    from profiling import install_dump_handler
+    from ratelimit import AdaptiveRateLimiter
+    from retry import RetryPolicy
+    from scrape import BASE_URL, JOBS_URL, BrighterMondayJobsScraper
+    from session import SessionStore
+
+    metrics = None
+    if args.metrics_file or args.metrics_port:
+        metrics = ScrapeMetrics()
+        if args.metrics_port:
+            serve_metrics(metrics.registry, args.metrics_port)
+
+    # kill -USR1 <pid> dumps the stack and stage timers of a running scrape
+    scraper = None
+    install_dump_handler(lambda: scraper.stats if scraper is not None else None)
+
+    # pass in the number of pages to scrape if provided
+    pages_to_scrape = int(args.pages) if args.pages else 5
+
+    # Start a fresh checkpoint, or continue from the saved one
+    def open_checkpoint(file_name, jobs_url):
+        if args.resume:
+            if Checkpoint.exists(file_name):
+                checkpoint = Checkpoint.load(file_name)
+                if args.pages:
+                    checkpoint.pages = pages_to_scrape
+                return checkpoint
+            print('No checkpoint found at {}. Starting from page 1.'.format(file_name))
+            sleep(2)
+        return Checkpoint(file_name, pages_to_scrape, jobs_url)
 
-    while True:
-        os.system('clear')
-        scraper = BrighterMondayJobsScraper()
+    checkpoint = open_checkpoint(args.checkpoint, JOBS_URL)
+    pages_to_scrape = checkpoint.pages
 
-        # pass in the number of pages to scrape if provided
-        if args.pages:
-            pages_to_scrape = args.pages
-            scraper = BrighterMondayJobsScraper(int(pages_to_scrape))
+    page_cache = None if args.page_cache == 'none' else PageCache(args.page_cache)
 
-        print(scraper.uiWindow)
-        main_menu_option = input('Option: ')
-        if main_menu_option == '1':
-            scraper.scrape()
-            break
-        elif main_menu_option == '2':
-            # set the file to load and search, if provided
-            if args.file:
-                file_name = args.file
-                scraper.search_scraped_jobs(file_name)
-            else:
-                print("You didn't specify a file to search. Please see the help options")
-            break
-        elif main_menu_option == '3':
-            print('Exiting.')
-            break
+    # Offline runs: re-extraction of cached pages, e.g. after fixing a
+    # selector, or a replay of a recorded run at full speed
+    if args.reparse or args.replay:
+        if args.replay:
+            offline_source = ReplaySource(args.replay)
+            # Recorded failures are retried as they were, minus the waiting
+            retry = RetryPolicy(args.retries, 0, sleep=lambda seconds: None)
+            pages = int(args.pages) if args.pages else offline_source.count('listing')
         else:
-            print('Wrong option.')
-            sleep(2)
+            if page_cache is None or not page_cache.count('listing'):
+                parser.error('--reparse needs cached listing pages, see --page-cache')
+            offline_source = page_cache
+            retry = RetryPolicy(1)
+            pages = int(args.pages) if args.pages else page_cache.count('listing')
+        scraper = BrighterMondayJobsScraper(pages, args.report, metrics, args.metrics_file, profiler, retry=retry,
+                offline_source=offline_source)
+        if profiler is not None:
+            with profiler:
+                scraper.scrape()
+        else:
+            scraper.scrape()
+        raise SystemExit(0)
+
+    # Cookies and consent from the last run
+    if args.fresh_session:
+        session = SessionStore(args.session)
+        session.clear()
+    else:
+        session = SessionStore.load(args.session)
+
+    # Shared by every scraper of the run, including one per category
+    rate_limiter = AdaptiveRateLimiter(args.rate, args.min_rate, args.max_rate, metrics=metrics)
+    blocking_stats = BlockingStats(args.blocking_stats)
+    archive = ArchiveWriter(args.record or default_archive_name()) if args.record is not None else None
+    http_cache = DetailCache(args.http_cache) if args.http_details and args.http_cache != 'none' else None
+    detail_memo = DetailMemo(args.detail_memo) if args.detail_memo != 'none' else None
+    browser_profile = None if args.browser_profile == 'none' else args.browser_profile
+    driver_resolver = DriverResolver(args.driver_cache, args.chromedriver)
+
+    def make_drivers(category=None):
+        # Browsers running side by side each need a profile folder of their own
+        user_data_dir = os.path.join(browser_profile, category) if browser_profile and category else browser_profile
+        return DriverManager(args.block, not args.show_browser, args.recycle_pages, args.max_browser_mb,
+                user_data_dir=user_data_dir, resolver=driver_resolver, clear_cookies=args.fresh_session)
+
+    def make_scraper(checkpoint, category=None, seen_links=None, stats=None, **kwargs):
+        return BrighterMondayJobsScraper(checkpoint.pages, args.report, metrics, args.metrics_file, profiler,
+                checkpoint, args.checkpoint_every, RetryPolicy(args.retries, args.retry_delay),
+                HttpFetcher() if args.http_details else None, rate_limiter, args.block, blocking_stats,
+                make_drivers(category), session, page_cache, archive=archive, http_cache=http_cache,
+                detail_memo=detail_memo, prefetch=args.prefetch, prefetch_with=args.prefetch_with,
+                jobs_url=checkpoint.jobs_url or JOBS_URL, category=category, seen_links=seen_links, stats=stats,
+                **kwargs)
+
+    def get_categories():
+        try:
+            return parse_categories(args.categories, HttpFetcher(), BASE_URL)
+        except Exception as e:
+            parser.error('Could not get the job categories: {}'.format(e))
+
+    # One scraper per category, each with its own checkpoint
+    def make_category_scrapers():
+        categories = get_categories()
+        checkpoint_base, checkpoint_ext = os.path.splitext(args.checkpoint)
+        seen_links = SeenLinks()
+        stats = Instrumentation(metrics)
+        return [make_scraper(open_checkpoint('{}.{}{}'.format(checkpoint_base, category, checkpoint_ext),
+                    category_url(BASE_URL, category)), category, seen_links, stats)
+                for category in categories]
+
+    # Unattended mode: incremental scrapes on a schedule, with the browsers,
+    # fetchers and caches kept between runs
+    if args.daemon:
+        try:
+            schedule = CronSchedule(args.cron) if args.cron else IntervalSchedule(args.interval)
+        except ValueError as e:
+            parser.error(str(e))
+        categories = get_categories() if args.categories else [None]
+        # Listings already in the store end every run's scrape
+        seen_links = SeenLinks(job['Link'] for file_name in expand_snapshot_paths([args.store])
+                for job in load_jobs(file_name))
+        print('{} jobs already in {}'.format(len(seen_links.links), args.store))
+        warm_drivers = OrderedDict((category, make_drivers(category)) for category in categories)
+        http_fetcher = HttpFetcher() if args.http_details else None
+
+        def run_once(stop_event):
+            print('Beginning scraping operation at {}...'.format(datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            stats = Instrumentation(metrics)
+            # What the store held before this run; jobs sibling categories
+            # claim during the run don't end another category's scrape
+            known_links = frozenset(seen_links.links)
+            scrapers = []
+            for category, drivers in warm_drivers.items():
+                scrapers.append(BrighterMondayJobsScraper(pages_to_scrape, args.report, metrics, args.metrics_file,
+                        retry=RetryPolicy(args.retries, args.retry_delay), http_fetcher=http_fetcher,
+                        rate_limiter=rate_limiter, block_profile=args.block, blocking_stats=blocking_stats,
+                        driver_manager=drivers, session=session, page_cache=page_cache, archive=archive,
+                        http_cache=http_cache, detail_memo=detail_memo, prefetch=args.prefetch,
+                        prefetch_with=args.prefetch_with,
+                        jobs_url=category_url(BASE_URL, category) if category else JOBS_URL, category=category,
+                        seen_links=seen_links, stats=stats, store_dir=args.store, incremental=True,
+                        keep_browser=True, stop_event=stop_event, known_links=known_links))
+            # For the SIGUSR1 dump
+            global scraper
+            scraper = scrapers[0]
+            jobs = BrighterMondayJobsScraper.run_all(scrapers, args.category_workers)
+            if not jobs:
+                print('No new jobs since the last run.')
+            scrapers[0].save_results(jobs)
+            if scrapers[0].scraping_error:
+                # Start the next run with fresh browsers in case these broke
+                for drivers in warm_drivers.values():
+                    drivers.quit()
+
+        def shut_down():
+            for drivers in warm_drivers.values():
+                drivers.quit()
+
+        ScrapeDaemon(run_once, schedule, metrics, shut_down).run()
+        raise SystemExit(0)
+
+    if args.categories:
+        scrapers = make_category_scrapers()
+        scraper = scrapers[0]
+        run = lambda: BrighterMondayJobsScraper.scrape_all(scrapers, args.category_workers)
+    else:
+        scraper = make_scraper(checkpoint)
+        run = scraper.scrape
+    if profiler is not None:
+        with profiler:
+            run()
+    else:
+        run()
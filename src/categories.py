@@ -0,0 +1,73 @@
+###
+#    Scraping several job categories side by side.
+#
+#    Each category gets its own scraper and browser, run on a thread of its
+#    own. They share the rate limiter, so together they never go faster than
+#    one scraper would, and a set of job links already claimed, so a job
+#    listed under several categories is kept, and its detail page fetched,
+#    only once.
+###
+
+from threading import Lock
+
+from parse import find_category_links, make_soup
+
+DEFAULT_CATEGORY = 'it-telecoms'
+
+
+def category_url(base_url, category):
+    return '{}jobs/{}'.format(base_url, category)
+
+
+# Reads the category slugs off the site's job index page
+def discover_categories(fetcher, base_url):
+    categories = find_category_links(make_soup(fetcher.get(base_url + 'jobs')))
+    if not categories:
+        raise ValueError('No job categories found on {}jobs'.format(base_url))
+    return categories
+
+
+# '--categories' value -> list of slugs; 'all' asks the site
+def parse_categories(value, fetcher, base_url):
+    if value.strip().lower() == 'all':
+        return discover_categories(fetcher, base_url)
+    return [category.strip().strip('/') for category in value.split(',') if category.strip()]
+
+
+class SeenLinks:
+    """ Job links claimed so far across all category scrapers
+    """
+
+    def __init__(self, links=()):
+        self.links = set(links)
+        self.lock = Lock()
+
+    # True if `link` wasn't claimed before, and is now
+    def claim(self, link):
+        with self.lock:
+            if link in self.links:
+                return False
+            self.links.add(link)
+            return True
+
+    def add_all(self, links):
+        with self.lock:
+            self.links.update(links)
+
+
+# Runs run_scrape() on every scraper, `workers` at a time, and returns
+# their jobs in category order. A category that fails outright is reported
+# and counted as an error without stopping the others.
+def scrape_categories(scrapers, workers=None):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def run(scraper):
+        try:
+            return scraper.run_scrape(save_session=False)
+        except Exception as e:
+            print('<<< Category {} failed: {} >>>'.format(scraper.category, e))
+            scraper.scraping_error = True
+            return []
+
+    with ThreadPoolExecutor(max_workers=workers or len(scrapers), thread_name_prefix='category') as executor:
+        return [job for jobs in executor.map(run, scrapers) for job in jobs]
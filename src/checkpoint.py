@@ -0,0 +1,83 @@
+###
+#    Checkpoints for long scrape runs.
+#
+#    After every completed listing page the scraper records how far it got,
+#    the jobs scraped so far and the listing pages and job links that failed
+#    and still need fetching. A run started with --resume re-fetches those
+#    and continues from the page after the last completed one instead of
+#    starting again at page 1.
+###
+
+from collections import OrderedDict
+from datetime import datetime
+import json
+import os
+
+from job import Job
+from store import to_json
+
+DEFAULT_CHECKPOINT = 'brightermondayjobs.checkpoint.json'
+
+
+class Checkpoint:
+    """ Progress of a scrape run, saved atomically as json
+    """
+
+    def __init__(self, file_name=DEFAULT_CHECKPOINT, pages=None, jobs_url=None):
+        self.file_name = file_name
+        self.pages = pages
+        self.jobs_url = jobs_url
+        self.started_at = datetime.now().isoformat()
+        self.last_completed_page = 0
+        self.jobs = []
+        # Links of jobs whose summary and description are still missing
+        self.pending_details = []
+        # Listing pages that failed and still need fetching
+        self.pending_pages = []
+
+    @classmethod
+    def load(cls, file_name=DEFAULT_CHECKPOINT):
+        with open(file_name, 'r') as f:
+            state = json.load(f, object_pairs_hook=OrderedDict)
+        checkpoint = cls(file_name, state['pages'], state.get('jobs_url'))
+        checkpoint.started_at = state['started_at']
+        checkpoint.last_completed_page = state['last_completed_page']
+        checkpoint.jobs = [Job(job) for job in state['jobs']]
+        checkpoint.pending_details = state['pending_details']
+        checkpoint.pending_pages = state.get('pending_pages', [])
+        return checkpoint
+
+    @classmethod
+    def exists(cls, file_name=DEFAULT_CHECKPOINT):
+        return os.path.exists(file_name)
+
+    def next_page(self):
+        return self.last_completed_page + 1
+
+    # Records a completed page. `jobs` is every job scraped so far.
+    def page_done(self, page, jobs, pending_details, pending_pages=()):
+        self.last_completed_page = page
+        self.jobs = list(jobs)
+        self.pending_details = list(pending_details)
+        self.pending_pages = list(pending_pages)
+
+    def save(self):
+        state = OrderedDict([
+            ('pages', self.pages),
+            ('jobs_url', self.jobs_url),
+            ('started_at', self.started_at),
+            ('saved_at', datetime.now().isoformat()),
+            ('last_completed_page', self.last_completed_page),
+            ('pending_pages', self.pending_pages),
+            ('pending_details', self.pending_details),
+            ('jobs', self.jobs),
+        ])
+        # Write to a temporary file first so a crash mid-save never leaves
+        # a truncated checkpoint behind
+        with open(self.file_name + '.tmp', 'w') as f:
+            json.dump(state, f, default=to_json)
+        os.replace(self.file_name + '.tmp', self.file_name)
+
+    def remove(self):
+        if os.path.exists(self.file_name):
+            os.remove(self.file_name)
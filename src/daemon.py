@@ -0,0 +1,155 @@
+###
+#    Scheduler daemon for unattended scrapes.
+#
+#    Instead of starting bmscraper.py from cron, `--daemon` keeps one process
+#    running: the browser, session cookies, rate limiter and caches stay
+#    warm between runs, and each run is incremental, stopping at the first
+#    listing page without new jobs. Runs happen every `--interval` seconds or
+#    on a `--cron` schedule. SIGTERM (or Ctrl+C) lets the run in progress
+#    finish the page it is on and save what it has before the daemon exits.
+###
+
+from datetime import datetime, timedelta
+from threading import Event
+import signal
+import time
+
+# (lowest, highest) value of each cron field
+CRON_FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day of month', 1, 31), ('month', 1, 12),
+        ('day of week', 0, 6))
+
+
+# Expands one cron field, e.g. '*/15', '1-5', '0,30' or '8-18/2', into the
+# set of values it matches
+def parse_cron_field(field, name, lowest, highest):
+    values = set()
+    for part in field.split(','):
+        spec, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if spec == '*':
+            start, end = lowest, highest
+        elif '-' in spec:
+            start, end = (int(value) for value in spec.split('-', 1))
+        else:
+            start = end = int(spec)
+            if step != 1:
+                end = highest
+        if name == 'day of week' and end == 7:
+            # Both 0 and 7 mean Sunday; a lone 7 is nothing else
+            values.add(0)
+            if start == 7:
+                continue
+            end = 6
+        if not lowest <= start <= end <= highest or step < 1:
+            raise ValueError('Invalid {} field in cron expression: {}'.format(name, field))
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """ Standard 5-field cron expression: minute hour day-of-month month
+        day-of-week, with *, lists, ranges and steps
+        Logic: As in cron, when both day fields are restricted a day matches
+        if either does
+    """
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError('Cron expression needs 5 fields (minute hour day month weekday): {}'.format(expression))
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            parse_cron_field(field, *spec) for field, spec in zip(fields, CRON_FIELDS))
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def day_matches(self, moment):
+        day = moment.day in self.days
+        # Python counts weekdays from Monday, cron from Sunday
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    # First matching minute after `now`
+    def next_run(self, now):
+        moment = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # A schedule that never matches (e.g. 31 February) gives up after
+        # looking five years ahead
+        limit = moment + timedelta(days=5 * 366)
+        while moment < limit:
+            if moment.month not in self.months or not self.day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError('Cron expression never matches: {}'.format(self.expression))
+
+    def __str__(self):
+        return 'cron "{}"'.format(self.expression)
+
+
+class IntervalSchedule:
+    """ A run every `seconds` seconds, the first one right away
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.first = True
+
+    def next_run(self, now):
+        if self.first:
+            self.first = False
+            return now
+        return now + timedelta(seconds=self.seconds)
+
+    def __str__(self):
+        return 'every {} seconds'.format(self.seconds)
+
+
+class ScrapeDaemon:
+    """ Calls run_once(stop_event) on a schedule until told to stop
+    """
+
+    def __init__(self, run_once, schedule, metrics=None, on_shutdown=None):
+        self.run_once = run_once
+        self.schedule = schedule
+        # Optional metrics.ScrapeMetrics, told when the next run is due
+        self.metrics = metrics
+        self.on_shutdown = on_shutdown
+        self.stop_event = Event()
+        self.runs = 0
+
+    def stop(self, signum=None, frame=None):
+        if not self.stop_event.is_set():
+            print('>>> Stopping after the page in progress...')
+        self.stop_event.set()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        print('Scraping {}. Send SIGTERM to stop.'.format(self.schedule))
+        try:
+            while not self.stop_event.is_set():
+                next_run = self.schedule.next_run(datetime.now())
+                if self.metrics is not None:
+                    self.metrics.next_run_timestamp.set(time.mktime(next_run.timetuple()))
+                wait = (next_run - datetime.now()).total_seconds()
+                if wait > 0:
+                    print('Next run at {}'.format(next_run.strftime('%Y-%m-%d %H:%M:%S')))
+                    # Wakes up early when stopped
+                    if self.stop_event.wait(wait):
+                        break
+                self.runs += 1
+                try:
+                    self.run_once(self.stop_event)
+                except Exception as e:
+                    # Keep the daemon alive; the next run may well succeed
+                    print('<<< Run {} failed: {} >>>'.format(self.runs, e))
+        finally:
+            if self.on_shutdown is not None:
+                self.on_shutdown()
+        print('Daemon stopped after {} runs.'.format(self.runs))
@@ -0,0 +1,102 @@
+###
+#    Memo of detail page extractions by content hash.
+#
+#    Even a detail page that has to be downloaded again usually carries a
+#    byte-identical job__details article. The article is hashed straight
+#    from the raw html (see parse.details_article()) and looked up here;
+#    on a hit the stored Summary and Description are used and the page is
+#    never parsed. A URL whose article hash differs from last time is logged
+#    as a change event.
+###
+
+from collections import OrderedDict
+from datetime import datetime
+from hashlib import sha256
+from threading import Lock
+import json
+import os
+
+from parse import DETAILS_PARSER_VERSION, details_article
+
+DEFAULT_DETAIL_MEMO = 'bmscraper_detail_memo.json'
+
+
+# sha256 of a detail page's job__details article, or None if it has none
+def article_digest(html):
+    article = details_article(html)
+    if article is None:
+        return None
+    return sha256(article.encode('utf-8')).hexdigest()
+
+
+class DetailMemo:
+    """ Extracted (summary, description) by article hash, and the last hash
+        seen for every detail URL
+        Logic: Memos written by another DETAILS_PARSER_VERSION are ignored,
+        so a change to the extraction code never serves stale fields
+    """
+
+    def __init__(self, file_name=DEFAULT_DETAIL_MEMO):
+        self.file_name = file_name
+        self.change_log = os.path.splitext(file_name)[0] + '.changes.jsonl'
+        # hash -> [summary, description]
+        self.extractions = {}
+        # url -> hash
+        self.urls = OrderedDict()
+        if os.path.exists(file_name):
+            with open(file_name, 'r') as f:
+                state = json.load(f, object_pairs_hook=OrderedDict)
+            if state.get('version') == DETAILS_PARSER_VERSION:
+                self.extractions = state['extractions']
+                self.urls = state['urls']
+        # This run's change events and lookups
+        self.changes = []
+        self.lookups = 0
+        self.hits = 0
+        # Category scrapers running side by side share one memo
+        self.lock = Lock()
+
+    # Returns (the memoized (summary, description) for an article hash or
+    # None, whether `url` had different content before). A change is also
+    # recorded as a change event.
+    def lookup(self, url, digest):
+        with self.lock:
+            self.lookups += 1
+            previous = self.urls.get(url)
+            changed = previous is not None and previous != digest
+            if changed:
+                self.changes.append(OrderedDict([
+                    ('url', url),
+                    ('changed_at', datetime.now().isoformat()),
+                    ('old_sha256', previous),
+                    ('new_sha256', digest),
+                ]))
+            self.urls[url] = digest
+            extraction = self.extractions.get(digest)
+            if extraction is None:
+                return None, changed
+            self.hits += 1
+            return tuple(extraction), changed
+
+    def store(self, url, digest, summary, description):
+        with self.lock:
+            self.urls[url] = digest
+            self.extractions[digest] = [summary, description]
+
+    def save(self):
+        # Only keep extractions some URL still points at
+        live = set(self.urls.values())
+        state = OrderedDict([
+            ('version', DETAILS_PARSER_VERSION),
+            ('urls', self.urls),
+            ('extractions', {digest: extraction for digest, extraction in self.extractions.items()
+                if digest in live}),
+        ])
+        with open(self.file_name + '.tmp', 'w') as f:
+            json.dump(state, f)
+        os.replace(self.file_name + '.tmp', self.file_name)
+        if self.changes:
+            with open(self.change_log, 'a') as f:
+                for change in self.changes:
+                    f.write(json.dumps(change) + '\n')
+            self.changes = []
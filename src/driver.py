@@ -0,0 +1,178 @@
+###
+#    Chrome driver lifecycle for long scrape runs.
+#
+#    The driver is started on first use, headless unless asked otherwise,
+#    and recycled (quit and started again) every N listing pages or as soon
+#    as Chrome's memory use passes a threshold, so memory stays bounded over
+#    thousands of pages. Cookies, and with them the cookie consent, are
+#    carried over to the new browser.
+###
+
+import os
+
+from blocking import DEFAULT_BLOCK_PROFILE, apply_blocking, apply_prefs
+from driverpath import DriverResolver
+
+WINDOW_SIZE = (1366, 768)
+
+
+# Resident memory in bytes of a process and all its descendants, read from
+# /proc. Returns None where /proc isn't available.
+def process_tree_rss(pid):
+    if not os.path.isdir('/proc'):
+        return None
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/{}/stat'.format(entry), 'r') as f:
+                # The process name may contain spaces, the fields after it don't
+                fields = f.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open('/proc/{}/status'.format(current), 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+# Converts cookies from driver.get_cookies() to DevTools Network.CookieParam
+def cdp_cookies(cookies):
+    converted = []
+    for cookie in cookies:
+        param = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')
+                if key in cookie}
+        if 'expiry' in cookie:
+            param['expires'] = cookie['expiry']
+        converted.append(param)
+    return converted
+
+
+class DriverManager:
+    """ Owns the scraper's Chrome driver: starts it lazily, recycles it to cap
+        memory and keeps cookies across restarts
+        Logic: Recycling only happens between listing pages, through
+        page_done(), when no detail window is open
+    """
+
+    def __init__(self, block_profile=DEFAULT_BLOCK_PROFILE, headless=True, recycle_pages=100, max_rss_mb=1536,
+            stats=None, user_data_dir=None, resolver=None, clear_cookies=False):
+        self.block_profile = block_profile
+        self.headless = headless
+        # Persistent Chrome profile folder, so cached static assets and
+        # cookies survive restarts and runs
+        self.user_data_dir = user_data_dir
+        # Set by --fresh-session: the first browser started drops the cookies
+        # the profile kept, consent included
+        self.clear_cookies = clear_cookies
+        # Restart after this many listing pages, or once Chrome and its
+        # helper processes use more than this much memory; 0 turns either off
+        self.recycle_pages = recycle_pages
+        self.max_rss_mb = max_rss_mb
+        # Optional instrument.Instrumentation for start and recycle timings
+        self.stats = stats
+        # Finds the ChromeDriver executable, see driverpath.py; share one
+        # between managers so it is only looked up once
+        self.resolver = resolver or DriverResolver()
+        self.driver = None
+        self.driver_path = None
+        self.pages = 0
+        self.restarts = 0
+        self.consent_given = False
+
+    # selenium is only imported once a browser is needed, so offline runs
+    # (--reparse, --replay) work without it
+    def options(self):
+        from selenium import webdriver
+        options = webdriver.ChromeOptions()
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_argument('--window-size={},{}'.format(*WINDOW_SIZE))
+        if self.headless:
+            options.add_argument('--headless=new')
+        if self.user_data_dir:
+            options.add_argument('--user-data-dir={}'.format(os.path.abspath(self.user_data_dir)))
+        apply_prefs(options, self.block_profile)
+        return options
+
+    # Returns the running driver, starting one if needed
+    def start(self):
+        if self.driver is not None:
+            return self.driver
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        if self.driver_path is None:
+            self.driver_path = self.resolver.resolve()
+        self.driver = webdriver.Chrome(options=self.options(), service=Service(self.driver_path))
+        self.driver.set_window_size(*WINDOW_SIZE)
+        self.driver.implicitly_wait(5)
+        apply_blocking(self.driver, self.block_profile)
+        if self.clear_cookies:
+            self.driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            self.clear_cookies = False
+        self.pages = 0
+        return self.driver
+
+    # Chrome's resident memory in bytes, or None if it can't be measured
+    def rss(self):
+        try:
+            pid = self.driver.service.process.pid
+        except AttributeError:
+            return None
+        return process_tree_rss(pid)
+
+    def needs_recycling(self):
+        if self.recycle_pages and self.pages >= self.recycle_pages:
+            return 'after {} pages'.format(self.pages)
+        if self.max_rss_mb:
+            rss = self.rss()
+            if rss is not None and rss > self.max_rss_mb * 2 ** 20:
+                return 'at {:.0f} MiB'.format(rss / 2 ** 20)
+        return None
+
+    # Counts a finished listing page and recycles the driver if it is due.
+    # Returns True if the driver was recycled.
+    def page_done(self):
+        if self.driver is None:
+            return False
+        self.pages += 1
+        reason = self.needs_recycling()
+        if reason is None:
+            return False
+        print('>>> Restarting browser {}'.format(reason))
+        self.recycle()
+        return True
+
+    # Quits the driver and starts a new one with the same cookies
+    def recycle(self):
+        cookies = self.driver.get_cookies()
+        self.quit()
+        self.start()
+        self.set_cookies(cookies)
+        self.restarts += 1
+        if self.stats is not None:
+            self.stats.count('driver_restarts')
+
+    # Restores cookies without navigating to their site first
+    def set_cookies(self, cookies):
+        if cookies:
+            self.driver.execute_cdp_cmd('Network.setCookies', {'cookies': cdp_cookies(cookies)})
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            finally:
+                self.driver = None
@@ -0,0 +1,107 @@
+###
+#    ChromeDriver resolution without the network.
+#
+#    ChromeDriverManager().install() asks the internet which driver matches
+#    the installed Chrome on every process start. The resolved driver path is
+#    cached on disk, keyed by the output of `google-chrome --version`, and
+#    reused as long as that version stays the same and the driver is still
+#    there. Hosts without internet access point at a driver of their own
+#    with --chromedriver or the BMSCRAPER_CHROMEDRIVER environment variable,
+#    and the driver manager is never asked.
+###
+
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+import json
+import os
+import re
+
+DRIVER_PATH_ENV = 'BMSCRAPER_CHROMEDRIVER'
+CHROME_BINARIES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser')
+CHROME_VERSION = re.compile(r'\d+(?:\.\d+)+')
+
+
+def default_driver_cache():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'bmscraper', 'chromedriver.json')
+
+
+# Version of the installed Chrome, e.g. '120.0.6099.109', or None if no
+# Chrome binary answers
+def chrome_version(binaries=CHROME_BINARIES):
+    import subprocess
+    for binary in binaries:
+        try:
+            output = subprocess.run([binary, '--version'], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = CHROME_VERSION.search(output)
+        if match:
+            return match.group()
+    return None
+
+
+# Fallback when nothing is configured or cached; needs webdriver_manager and,
+# usually, the network
+def install_driver():
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+
+class DriverResolver:
+    """ Finds the ChromeDriver executable: the configured one, else the one
+        cached for the installed Chrome version, else a freshly installed one
+        Logic: Resolves at most once per process, so browsers started side by
+        side or restarted share the answer
+    """
+
+    def __init__(self, cache_file=None, driver_path=None, chrome_binary=None, install=install_driver):
+        self.cache_file = cache_file or default_driver_cache()
+        self.driver_path = driver_path or os.environ.get(DRIVER_PATH_ENV) or None
+        self.binaries = (chrome_binary,) if chrome_binary else CHROME_BINARIES
+        self.install = install
+        self.lock = Lock()
+        self.resolved = None
+        # How the path was found: 'configured', 'cached' or 'installed'
+        self.source = None
+
+    def load_cache(self):
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f, object_pairs_hook=OrderedDict)
+        except (OSError, ValueError):
+            return OrderedDict()
+
+    def save_cache(self, cache):
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        with open(self.cache_file + '.tmp', 'w') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(self.cache_file + '.tmp', self.cache_file)
+
+    def resolve(self):
+        with self.lock:
+            if self.resolved is None:
+                self.resolved, self.source = self._resolve()
+            return self.resolved
+
+    def _resolve(self):
+        if self.driver_path:
+            if not os.path.isfile(self.driver_path):
+                raise FileNotFoundError('ChromeDriver not found at configured path: {}'.format(self.driver_path))
+            return self.driver_path, 'configured'
+
+        version = chrome_version(self.binaries)
+        cache = self.load_cache()
+        entry = cache.get(version) if version else None
+        if entry is not None and os.path.isfile(entry['path']):
+            return entry['path'], 'cached'
+
+        path = self.install()
+        if version:
+            cache[version] = OrderedDict([
+                ('path', path),
+                ('resolved_at', datetime.now().isoformat()),
+            ])
+            self.save_cache(cache)
+        return path, 'installed'
@@ -0,0 +1,94 @@
+###
+#    Plain HTTP fetching for pages that don't need a browser.
+#
+#    Job detail pages are rendered on the server, so they can be fetched
+#    with urllib instead of opening a browser window per job.
+###
+
+import re
+import urllib.error
+import urllib.request
+
+from session import cookie_header
+
+USER_AGENT = ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/114.0.0.0 Safari/537.36')
+
+
+class Response:
+    """ Status, headers and raw body of an HTTP response, along with the
+        headers it was requested with
+    """
+
+    def __init__(self, url, status, reason, headers, body, request_headers=None):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        # (name, value) pairs in the order the server sent them
+        self.headers = headers
+        self.body = body
+        self.request_headers = request_headers or {}
+
+    def header(self, name, default=None):
+        name = name.lower()
+        for key, value in self.headers:
+            if key.lower() == name:
+                return value
+        return default
+
+    @property
+    def charset(self):
+        match = re.search(r'charset=([\w-]+)', self.header('Content-Type', ''), re.IGNORECASE)
+        return match.group(1) if match else 'utf-8'
+
+    @property
+    def text(self):
+        try:
+            return self.body.decode(self.charset, errors='replace')
+        except LookupError:
+            return self.body.decode('utf-8', errors='replace')
+
+
+class HttpFetcher:
+    """ Fetches pages over HTTP. Errors are left to the caller (and its
+        retry policy): urllib.error.HTTPError for 4xx/5xx responses,
+        URLError or socket.timeout for network problems.
+    """
+
+    def __init__(self, timeout=30, user_agent=USER_AGENT):
+        self.timeout = timeout
+        self.headers = {
+            'User-Agent': user_agent,
+            'Accept': 'text/html,application/xhtml+xml',
+            'Accept-Language': 'en-US,en;q=0.9',
+        }
+        # Sent along with every request they apply to, see set_cookies()
+        self.cookies = []
+
+    # Takes cookies as returned by the driver's get_cookies()
+    def set_cookies(self, cookies):
+        self.cookies = list(cookies)
+
+    # Returns the Response for `url`; `extra_headers` are sent on top of
+    # the usual ones. A 304 comes back as a Response with an empty body.
+    def fetch(self, url, extra_headers=None):
+        headers = dict(self.headers)
+        cookies = cookie_header(self.cookies, url)
+        if cookies:
+            headers['Cookie'] = cookies
+        if extra_headers:
+            headers.update(extra_headers)
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return Response(url, response.status, response.reason, list(response.headers.items()),
+                        response.read(), headers)
+        except urllib.error.HTTPError as e:
+            # urllib treats 304 Not Modified as an error, but it's the
+            # answer a conditional request hopes for
+            if e.code != 304:
+                raise
+            return Response(url, 304, e.reason, list(e.headers.items()), b'', headers)
+
+    def get(self, url):
+        return self.fetch(url).text
@@ -0,0 +1,88 @@
+###
+#    Conditional-request cache for job detail pages fetched over HTTP.
+#
+#    Detail pages rarely change once a job is posted. For every detail page
+#    the cache keeps the ETag and Last-Modified validators the server sent
+#    along with the Summary and Description extracted from it. The next run
+#    sends them back as If-None-Match/If-Modified-Since; a 304 Not Modified
+#    answer reuses the stored extraction without downloading or parsing the
+#    page again.
+###
+
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+import json
+import os
+
+DEFAULT_HTTP_CACHE = 'bmscraper_http_cache.json'
+
+
+class DetailCache:
+    """ Validators and extracted fields of detail pages, by URL
+    """
+
+    def __init__(self, file_name=DEFAULT_HTTP_CACHE):
+        self.file_name = file_name
+        self.entries = OrderedDict()
+        if os.path.exists(file_name):
+            with open(file_name, 'r') as f:
+                self.entries = json.load(f, object_pairs_hook=OrderedDict)
+        # This run's conditional requests
+        self.requests = 0
+        self.hits = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+        # Category scrapers running side by side share one cache
+        self.lock = Lock()
+
+    # Headers that make a request for `url` conditional, if it was seen before
+    def validators(self, url):
+        with self.lock:
+            entry = self.entries.get(url)
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    # Returns (summary, description) stored for `url` if `response` says it
+    # hasn't changed, else None. Counts the request either way.
+    def lookup(self, url, response):
+        with self.lock:
+            self.requests += 1
+            entry = self.entries.get(url)
+            if response.status == 304 and entry is not None:
+                self.hits += 1
+                # The page would have been as big as last time
+                self.bytes_saved += entry['size']
+                return entry['summary'], entry['description']
+            self.bytes_downloaded += len(response.body)
+            return None
+
+    def store(self, url, response, summary, description):
+        etag, last_modified = response.header('ETag'), response.header('Last-Modified')
+        with self.lock:
+            if not etag and not last_modified:
+                # Nothing to revalidate with next time
+                self.entries.pop(url, None)
+                return
+            self.entries[url] = OrderedDict([
+                ('etag', etag),
+                ('last_modified', last_modified),
+                ('size', len(response.body)),
+                ('fetched_at', datetime.now().isoformat()),
+                ('summary', summary),
+                ('description', description),
+            ])
+
+    def hit_ratio(self):
+        return self.hits / self.requests if self.requests else 0.0
+
+    def save(self):
+        with self.lock:
+            with open(self.file_name + '.tmp', 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(self.file_name + '.tmp', self.file_name)
@@ -0,0 +1,106 @@
+###
+#    Lightweight timing instrumentation for scrape runs.
+#
+#    Stages are timed with `with stats.stage('name'):` blocks and events are
+#    tallied with `stats.count('name')`. At the end of a run `summary()`
+#    gives p50/p95/max per stage plus pages/sec and jobs/sec, which can be
+#    printed or written out as a json run report.
+###
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock
+from time import perf_counter
+import json
+
+
+# Nearest-rank percentile of a list of samples
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[rank]
+
+
+class Instrumentation:
+    """ Collects named stage timings and counters for a single run
+        Logic: If a metrics object (see metrics.ScrapeMetrics) is given, every
+        timing and count is forwarded to it as well
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self.started_at = datetime.now()
+        self.started = perf_counter()
+        self.finished = None
+        # stage name -> list of durations in seconds
+        self.timings = OrderedDict()
+        # counter name -> value
+        self.counters = OrderedDict()
+        # Scrapers running side by side (e.g. one per category) can share
+        # one Instrumentation
+        self.lock = Lock()
+
+    @contextmanager
+    def stage(self, name):
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - started)
+
+    def observe(self, name, seconds):
+        with self.lock:
+            self.timings.setdefault(name, []).append(seconds)
+        if self.metrics is not None:
+            self.metrics.observe_stage(name, seconds)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+        if self.metrics is not None:
+            self.metrics.count(name, n)
+
+    def finish(self):
+        self.finished = perf_counter()
+
+    def elapsed(self):
+        return (self.finished or perf_counter()) - self.started
+
+    def summary(self):
+        elapsed = self.elapsed()
+        stages = OrderedDict()
+        for name, samples in self.timings.items():
+            stages[name] = OrderedDict([
+                ('count', len(samples)),
+                ('total', sum(samples)),
+                ('p50', percentile(samples, 50)),
+                ('p95', percentile(samples, 95)),
+                ('max', max(samples)),
+            ])
+        return OrderedDict([
+            ('started_at', self.started_at.isoformat()),
+            ('elapsed_seconds', elapsed),
+            ('pages_per_sec', self.counters.get('pages', 0) / elapsed if elapsed else 0.0),
+            ('jobs_per_sec', self.counters.get('jobs', 0) / elapsed if elapsed else 0.0),
+            ('counters', OrderedDict(self.counters)),
+            ('stages', stages),
+        ])
+
+    def print_summary(self, file=None):
+        summary = self.summary()
+        print('Run took {:.1f} s: {:.2f} pages/sec, {:.2f} jobs/sec'.format(
+            summary['elapsed_seconds'], summary['pages_per_sec'], summary['jobs_per_sec']), file=file)
+        print('{:20} {:>6} {:>10} {:>10} {:>10} {:>10}'.format('Stage', 'Count', 'Total s', 'p50 ms', 'p95 ms', 'Max ms'),
+                file=file)
+        for name, stage in summary['stages'].items():
+            print('{:20} {:>6} {:>10.2f} {:>10.1f} {:>10.1f} {:>10.1f}'.format(
+                name, stage['count'], stage['total'], stage['p50'] * 1000, stage['p95'] * 1000, stage['max'] * 1000), file=file)
+        for name, value in summary['counters'].items():
+            print('{:20} {:>6}'.format(name, value), file=file)
+
+    def write_report(self, file_name):
+        with open(file_name, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
@@ -0,0 +1,122 @@
+###
+#    Compact record type for scraped jobs.
+#
+#    A snapshot of a few hundred thousand jobs held as dicts spends most of
+#    its memory on per-job dict tables and on repeated copies of the same
+#    location, company, type, salary, category and date strings. A Job keeps
+#    its fields in slots, shares one key-order tuple with every job of the
+#    same shape and interns those categorical values, while still behaving
+#    like the dict it replaces: job['Title'], job.get('Summary'), items()
+#    and friends all work, and missing keys stay missing.
+###
+
+from collections.abc import Mapping, MutableMapping
+from sys import intern
+
+# The fields of a scraped job, in the order they are saved
+FIELDS = ('ID', 'Title', 'Link', 'Summary', 'Description', 'Poster', 'Location', 'Type', 'Salary', 'Category',
+        'Date_Posted')
+
+# Fields with a small set of values repeated across many jobs
+CATEGORICAL_FIELDS = frozenset(['Poster', 'Location', 'Type', 'Salary', 'Category', 'Date_Posted'])
+
+_FIELD_SET = frozenset(FIELDS)
+
+# Key orders seen so far; jobs with the same keys share one tuple
+_LAYOUTS = {}
+
+
+def _layout(keys):
+    return _LAYOUTS.setdefault(keys, keys)
+
+
+class Job(MutableMapping):
+    """ One job, with the keys and key order it was built or loaded with
+        Logic: Keys outside FIELDS are kept in a small dict of their own, so
+        any json object round-trips unchanged
+    """
+
+    __slots__ = FIELDS + ('_layout', '_extra')
+
+    # Takes a mapping or (key, value) pairs, which makes Job usable as the
+    # object_pairs_hook of json.load(). Loading is the hot path, hence the
+    # slot setters looked up once in _SETTERS.
+    def __init__(self, pairs=()):
+        if type(pairs) is not list:
+            pairs = list(pairs.items() if isinstance(pairs, Mapping) else pairs)
+        extra = None
+        for key, value in pairs:
+            setter = _SETTERS.get(key)
+            if setter is None:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+            else:
+                if key in CATEGORICAL_FIELDS and type(value) is str:
+                    value = intern(value)
+                setter(self, value)
+        self._extra = extra
+        self._layout = _layout(tuple([key for key, value in pairs]))
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                return object.__getattribute__(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None or key not in self._extra:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key not in self._layout:
+            self._layout = _layout(self._layout + (key,))
+        if key in _FIELD_SET:
+            if key in CATEGORICAL_FIELDS and type(value) is str:
+                value = intern(value)
+            object.__setattr__(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self._layout:
+            raise KeyError(key)
+        self._layout = _layout(tuple(name for name in self._layout if name != key))
+        if key in _FIELD_SET:
+            object.__delattr__(self, key)
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key):
+        return key in self._layout
+
+    def __iter__(self):
+        return iter(self._layout)
+
+    def __len__(self):
+        return len(self._layout)
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        if self._extra is None:
+            return default
+        return self._extra.get(key, default)
+
+    # A plain dict with the same keys in the same order, e.g. for json
+    def to_dict(self):
+        return {key: self[key] for key in self._layout}
+
+    def __repr__(self):
+        return 'Job({!r})'.format(self.to_dict())
+
+    # Pickles (e.g. to and from search worker processes) as its items, so
+    # the unpickled job is interned again
+    def __reduce__(self):
+        return Job, (list(self.items()),)
+
+
+# field -> its slot's setter
+_SETTERS = {name: Job.__dict__[name].__set__ for name in FIELDS}
@@ -0,0 +1,87 @@
+###
+#    Load test for the local job search server (see server.py).
+#
+#    Opens a number of keep-alive connections and fires searches at the
+#    server as fast as it answers, then reports throughput and p50/p99
+#    latency.
+#
+#    python loadtest.py --port 8080 --requests 5000 --concurrency 20
+###
+
+from argparse import ArgumentParser
+from time import perf_counter
+from urllib.parse import urlencode
+import asyncio
+import itertools
+
+from instrument import percentile
+
+# A mix of the searches the dashboards run
+DEFAULT_PATHS = [
+    '/search/title?' + urlencode({'q': 'developer'}),
+    '/search/title?' + urlencode({'q': 'sales'}),
+    '/search/location?' + urlencode({'q': 'nairobi'}),
+    '/search/company?' + urlencode({'q': 'brightermonday'}),
+    '/search/date_posted?' + urlencode({'q': '1 week ago'}),
+    '/search/all?' + urlencode({'title': 'engineer', 'location': 'remote',
+        'company': '', 'date_posted': '1 week ago'}),
+]
+
+
+async def worker(host, port, paths, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for path in paths:
+            started = perf_counter()
+            writer.write('GET {} HTTP/1.1\r\nHost: {}\r\n\r\n'.format(path, host).encode('latin-1'))
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(host, port, requests, concurrency, paths):
+    requests_per_worker = max(1, requests // concurrency)
+    cycle = itertools.cycle(paths)
+    latencies = []
+    errors = []
+    started = perf_counter()
+    await asyncio.gather(*[
+        worker(host, port, [next(cycle) for _ in range(requests_per_worker)], latencies, errors)
+        for _ in range(concurrency)
+    ])
+    elapsed = perf_counter() - started
+
+    print('Requests       : {}'.format(len(latencies)))
+    print('Errors         : {}'.format(len(errors)))
+    print('Concurrency    : {}'.format(concurrency))
+    print('Wall time      : {:.2f} s'.format(elapsed))
+    print('Throughput     : {:.0f} req/s'.format(len(latencies) / elapsed if elapsed else 0))
+    print('Latency p50    : {:.2f} ms'.format(percentile(latencies, 50) * 1000))
+    print('Latency p99    : {:.2f} ms'.format(percentile(latencies, 99) * 1000))
+    print('Latency max    : {:.2f} ms'.format(max(latencies) * 1000 if latencies else 0))
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1', help='Search server host')
+    parser.add_argument('--port', type=int, default=8080, help='Search server port')
+    parser.add_argument('-n', '--requests', type=int, default=2000, help='Total number of requests')
+    parser.add_argument('-c', '--concurrency', type=int, default=10, help='Number of parallel connections')
+    parser.add_argument('--path', action='append', help='Request path to use instead of the default mix; '
+            'may be given several times')
+    args = parser.parse_args()
+
+    asyncio.run(run(args.host, args.port, args.requests, args.concurrency, args.path or DEFAULT_PATHS))
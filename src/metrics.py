@@ -0,0 +1,252 @@
+###
+#    Prometheus-style metrics for scrape runs.
+#
+#    Counters, gauges and histograms are kept in a Registry, rendered in the
+#    Prometheus text exposition format and either written to a file for the
+#    node_exporter textfile collector at the end of a run or served on
+#    /metrics from a background thread for long-running processes.
+###
+
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+
+# Stage latency buckets in seconds, from sub-millisecond parsing up to
+# slow page loads
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+        .replace('"', '\\"').replace('\n', '\\n')) for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        # label values tuple -> value (or histogram state)
+        self.values = OrderedDict()
+        self.lock = threading.Lock()
+        # Unlabelled counters and gauges start at zero so they show up in
+        # the output before anything happens
+        if not self.labelnames and self.kind in ('counter', 'gauge'):
+            self.values[()] = 0
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError('{} expects labels {}'.format(self.name, ', '.join(self.labelnames)))
+        return tuple(labels[name] for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        return tuple(zip(self.labelnames, key)) + tuple(extra)
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, self._labels(key), value) for key, value in self.values.items()]
+
+    def render(self):
+        lines = ['# HELP {} {}'.format(self.name, self.help_text),
+                '# TYPE {} {}'.format(self.name, self.kind)]
+        for name, labels, value in self.samples():
+            lines.append('{}{} {}'.format(name, _format_labels(labels), _format_value(value)))
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def get(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=STAGE_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # per-bucket counts, sum, count
+                state = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][position] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, (counts, total, count) in self.values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append((self.name + '_bucket',
+                        self._labels(key, [('le', _format_value(bound))]), cumulative))
+                samples.append((self.name + '_sum', self._labels(key), total))
+                samples.append((self.name + '_count', self._labels(key), count))
+        return samples
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = OrderedDict()
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError('Metric {} is already registered'.format(metric.name))
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=STAGE_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        return '\n'.join(metric.render() for metric in self.metrics.values()) + '\n'
+
+
+# Writes the registry for the node_exporter textfile collector. The file is
+# written next to its final name and renamed so the collector never reads
+# half of it.
+def write_textfile(registry, file_name):
+    with open(file_name + '.tmp', 'w') as f:
+        f.write(registry.render())
+    os.replace(file_name + '.tmp', file_name)
+
+
+# Serves the registry on http://host:port/metrics from a daemon thread and
+# returns the server so callers can shut it down
+def serve_metrics(registry, port, host=''):
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            payload = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        # Keep scrape output readable
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class ScrapeMetrics:
+    """ The scraper's metrics, fed by Instrumentation as stages are timed
+        and events counted
+    """
+
+    # Instrumentation counter name -> metric name
+    COUNTERS = OrderedDict([
+        ('pages', ('bmscraper_pages_scraped_total', 'Listing pages scraped')),
+        ('jobs', ('bmscraper_jobs_extracted_total', 'Jobs extracted from listing pages')),
+        ('featured_skipped', ('bmscraper_featured_jobs_skipped_total', 'Featured jobs skipped')),
+        ('detail_errors', ('bmscraper_detail_fetch_failures_total', 'Job detail pages that failed to load or parse')),
+        ('page_errors', ('bmscraper_page_errors_total', 'Listing pages that failed after all retries')),
+        ('card_errors', ('bmscraper_card_errors_total', 'Job cards skipped because they could not be parsed')),
+        ('retries', ('bmscraper_retries_total', 'Listing and detail page fetches retried')),
+        ('dead_letters', ('bmscraper_dead_letters_total', 'URLs given up on after all retries')),
+        ('bytes_transferred', ('bmscraper_bytes_transferred_total', 'Bytes the browser downloaded for listing '
+            'and detail pages and their resources')),
+        ('http_cache_hits', ('bmscraper_http_cache_hits_total', 'Detail pages the server reported unchanged (304)')),
+        ('http_cache_misses', ('bmscraper_http_cache_misses_total', 'Detail pages downloaded in full over HTTP')),
+        ('detail_memo_hits', ('bmscraper_detail_memo_hits_total', 'Detail pages whose content was unchanged, '
+            'so extraction was skipped')),
+        ('detail_changes', ('bmscraper_detail_changes_total', 'Detail pages whose content changed since last seen')),
+        ('prefetch_hits', ('bmscraper_prefetch_hits_total', 'Listing pages that were prefetched in the background')),
+        ('driver_restarts', ('bmscraper_driver_restarts_total', 'Browser restarts to keep memory bounded')),
+    ])
+
+    def __init__(self, registry=None):
+        self.registry = registry or Registry()
+        self.counters = OrderedDict()
+        for name, (metric_name, help_text) in self.COUNTERS.items():
+            self.counters[name] = self.registry.counter(metric_name, help_text)
+        self.stage_seconds = self.registry.histogram('bmscraper_stage_duration_seconds',
+                'Time spent in each stage of a scrape run', ['stage'])
+        self.runs = self.registry.counter('bmscraper_runs_total', 'Scrape runs by outcome', ['outcome'])
+        self.last_run_timestamp = self.registry.gauge('bmscraper_last_run_timestamp_seconds',
+                'Unix time the last scrape run finished')
+        self.last_run_duration = self.registry.gauge('bmscraper_last_run_duration_seconds',
+                'Wall time of the last scrape run')
+        self.last_run_success = self.registry.gauge('bmscraper_last_run_success',
+                '1 if the last scrape run finished without errors, 0 otherwise')
+        self.next_run_timestamp = self.registry.gauge('bmscraper_next_run_timestamp_seconds',
+                'Unix time the scrape daemon starts its next run')
+        self.rate_limit = self.registry.gauge('bmscraper_rate_limit_requests_per_second',
+                'Current request rate allowed per host by the adaptive rate limiter', ['host'])
+
+    def count(self, name, n=1):
+        counter = self.counters.get(name)
+        if counter is not None:
+            counter.inc(n)
+
+    def observe_stage(self, name, seconds):
+        self.stage_seconds.observe(seconds, stage=name)
+
+    def set_rate(self, host, rate):
+        self.rate_limit.set(rate, host=host)
+
+    def finish_run(self, finished_at, duration, success):
+        self.runs.inc(outcome='success' if success else 'error')
+        self.last_run_timestamp.set(finished_at)
+        self.last_run_duration.set(duration)
+        self.last_run_success.set(1 if success else 0)
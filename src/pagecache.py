@@ -0,0 +1,92 @@
+###
+#    Content-addressed on-disk cache of fetched pages.
+#
+#    Every listing and detail page the scraper fetches is gzipped and stored
+#    under the sha256 of its html, so a page that hasn't changed between runs
+#    is only stored once. An append-only index records which URL was fetched
+#    when and what content it returned. `bmscraper.py --reparse` runs the
+#    extraction over the cached pages without touching the network.
+#
+#    Layout:
+#
+#        <root>/index.jsonl                      one fetch per line
+#        <root>/objects/ab/abcdef...html.gz      page content
+###
+
+from collections import OrderedDict
+from datetime import datetime
+from hashlib import sha256
+from threading import Lock
+import gzip
+import json
+import os
+
+DEFAULT_PAGE_CACHE = 'bmscraper_page_cache'
+
+
+class PageNotCached(KeyError):
+    """ The page was never fetched (before the given time)
+    """
+
+
+class PageCache:
+    """ Pages by URL and fetch time, stored once per distinct content
+    """
+
+    def __init__(self, root=DEFAULT_PAGE_CACHE):
+        self.root = root
+        self.index_file = os.path.join(root, 'index.jsonl')
+        # url -> fetches (OrderedDicts) in the order they happened
+        self.fetches = OrderedDict()
+        self.lock = Lock()
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line, object_pairs_hook=OrderedDict)
+                        self.fetches.setdefault(entry['url'], []).append(entry)
+
+    def object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest + '.html.gz')
+
+    # Stores a fetched page and returns its content hash
+    def put(self, url, html, kind, fetched_at=None):
+        data = html.encode('utf-8')
+        digest = sha256(data).hexdigest()
+        entry = OrderedDict([
+            ('url', url),
+            ('fetched_at', fetched_at or datetime.now().isoformat()),
+            ('kind', kind),
+            ('sha256', digest),
+            ('size', len(data)),
+        ])
+        path = self.object_path(digest)
+        with self.lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with gzip.open(path + '.tmp', 'wb') as f:
+                    f.write(data)
+                os.replace(path + '.tmp', path)
+            with open(self.index_file, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+            self.fetches.setdefault(url, []).append(entry)
+        return digest
+
+    # The latest fetch of `url`, or the latest one at or before the ISO
+    # timestamp `before`
+    def entry(self, url, before=None):
+        for entry in reversed(self.fetches.get(url, [])):
+            if before is None or entry['fetched_at'] <= before:
+                return entry
+        raise PageNotCached(url)
+
+    def get(self, url, before=None):
+        with gzip.open(self.object_path(self.entry(url, before)['sha256']), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def __contains__(self, url):
+        return url in self.fetches
+
+    # Number of distinct URLs of the given kind
+    def count(self, kind):
+        return sum(1 for fetches in self.fetches.values() if fetches[-1]['kind'] == kind)
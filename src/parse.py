@@ -0,0 +1,193 @@
+###
+#    Extraction of job data from BrighterMonday listing and detail pages.
+#
+#    Kept apart from the browser code so the same logic can run on pages
+#    from any source: a live Selenium session, a cache or a benchmark.
+###
+
+from collections import OrderedDict
+import re
+
+from job import Job
+
+# CSS classes of the elements we read on listing and detail pages
+FEATURED_CLASS = 'flex flex-shrink-0 justify-center items-center w-5 text-xs font-medium text-white uppercase rounded-l-md rounded-bl-none bg-brand-secondary'
+TITLE_LINK_CLASS = 'relative mb-3 text-lg font-medium break-words focus:outline-none metrics-apply-now text-link-500 text-loading-animate'
+POSTER_CLASS = 'text-sm text-link-500'
+LOCATION_TYPE_SALARY_CLASS = 'flex flex-wrap mt-3 text-sm text-gray-500 md:py-0'
+CATEGORY_CLASS = 'text-sm text-gray-500 text-loading-animate inline-block'
+DATE_POSTED_CLASS = 'flex flex-row items-start items-center px-5 py-3 w-full border-t border-gray-300'
+DETAILS_SECTION_CLASS = 'py-5 px-4 border-b border-gray-300 md:p-5'
+
+NO_SUMMARY = 'No summary available'
+NO_DESCRIPTION = 'No description available'
+
+# Bump whenever parse_job_details() changes what it extracts, so details
+# memoized by an older version aren't reused
+DETAILS_PARSER_VERSION = 1
+
+DETAILS_ARTICLE_OPEN = re.compile(r'<article\b[^>]*\bclass="[^"]*\bjob__details\b[^"]*"[^>]*>', re.IGNORECASE)
+ARTICLE_TAG = re.compile(r'<(/?)article\b', re.IGNORECASE)
+
+# Links to a category's listings, e.g. /jobs/it-telecoms. Locations and job
+# types are linked the same way.
+JOBS_LINK = re.compile(r'^(?:https?://(?:www\.)?brightermonday\.co\.ke)?/jobs/([a-z0-9-]+)/?$')
+CATEGORY_HEADING = re.compile(r'categor|job function', re.IGNORECASE)
+
+
+# bs4 and lxml are imported on first use, so modules that only need the
+# constants or the string helpers here stay light
+def make_soup(html):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, 'lxml')
+
+
+# Returns the job card sections on a listing page
+def find_job_sections(soup):
+    return soup.find_all(attrs={"data-cy": "listing-cards-components"})
+
+
+# Checks whether the listing page links to a next page
+def has_next_page(soup):
+    return soup.select_one("nav[role='navigation'] > div > a[rel='next']") is not None
+
+
+def is_featured(job_section):
+    try:
+        return job_section.find('div', class_=FEATURED_CLASS).span.text.strip() == 'FEATURED'
+    except AttributeError:
+        return False
+
+
+# Builds a job from a listing card. Jobs with a link get placeholder
+# summary and description entries right after the link, to be filled in
+# from the detail page, so the key order matches what we have always saved.
+def parse_job_card(job_section):
+    # A Job keeps its keys in the order they are set, like the OrderedDict
+    # used before it, in a fraction of the memory
+    job = Job()
+
+    # Generate UUID for the job; uuid is slow to import and only scrapes
+    # need it
+    import uuid
+    job['ID'] = str(uuid.uuid4())
+
+    title_link = job_section.find('a', class_=TITLE_LINK_CLASS)
+    if title_link:
+        job['Title'] = title_link.p.text.strip()
+        job['Link'] = title_link['href']
+        job['Summary'] = NO_SUMMARY
+        job['Description'] = NO_DESCRIPTION
+    else:
+        job['Title'] = 'No title provided'
+        job['Link'] = 'No link available'
+
+    job_poster = job_section.find('p', class_=POSTER_CLASS)
+    if job_poster:
+        job['Poster'] = job_poster.text.strip()
+    else:
+        job['Poster'] = 'No job poster found'
+
+    job_location_type_salary = job_section.find('div', class_=LOCATION_TYPE_SALARY_CLASS)
+    if job_location_type_salary:
+        job_location_type_salary = job_location_type_salary.find_all('span')
+        job['Location'] = job_location_type_salary[0].text.strip()
+        job['Type'] = job_location_type_salary[1].text.strip()
+        job['Salary'] = job_location_type_salary[2].text.strip()
+
+    job_category = job_section.find('p', class_=CATEGORY_CLASS)
+    if job_category:
+        job['Category'] = job_category.text.strip().split(":")[1].strip()
+    else:
+        job['Category'] = 'Category not provided'
+
+    date_posted = job_section.find('div', class_=DATE_POSTED_CLASS)
+    if date_posted:
+        job['Date_Posted'] = date_posted.p.text.strip()
+    else:
+        job['Date_Posted'] = 'Date posted not provided'
+
+    return job
+
+
+# 'IT & Telecoms' -> 'it-telecoms'
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def _in_category_section(link):
+    # The closest enclosing section with a heading decides
+    for parent in list(link.parents)[:6]:
+        heading = parent.find(['h2', 'h3', 'h4', 'h5', 'legend', 'summary', 'button', 'label'])
+        if heading is not None:
+            return CATEGORY_HEADING.search(heading.get_text()) is not None
+    return False
+
+
+# Returns the category slugs linked from the site's job index page, in page
+# order. Category links are /jobs/<slug> links whose text is the category
+# name; where a categories section can be found only its links count, so
+# location and job type links are left out.
+def find_category_links(soup):
+    all_slugs = OrderedDict()
+    section_slugs = OrderedDict()
+    for link in soup.find_all('a', href=True):
+        match = JOBS_LINK.match(link['href'])
+        if match is None:
+            continue
+        # Drop job counts such as 'IT & Telecoms (120)'
+        name = re.sub(r'\(?\d[\d,]*\)?$', '', link.get_text(' ', strip=True)).strip()
+        slug = match.group(1)
+        if slugify(name) != slug:
+            continue
+        all_slugs[slug] = True
+        if _in_category_section(link):
+            section_slugs[slug] = True
+    return list(section_slugs or all_slugs)
+
+
+# Parses a whole listing page into (jobs, featured jobs skipped, has next page)
+def parse_listing(html):
+    soup = make_soup(html)
+    jobs = []
+    featured = 0
+    for job_section in find_job_sections(soup):
+        if is_featured(job_section):
+            featured += 1
+            continue
+        jobs.append(parse_job_card(job_section))
+    return jobs, featured, has_next_page(soup)
+
+
+# Extracts (summary, description) html from a job detail page.
+# Raises AttributeError or IndexError if the details section is missing.
+def parse_job_details(html):
+    job_soup = make_soup(html)
+    job_summary_desc = job_soup.find('article', class_='job__details')
+    # find job summary and job description in the job details section
+    # if not found, use 'No summary available' and 'No description available'
+    # respectively
+    job_summary_desc_list = job_summary_desc.find_all('div', class_=DETAILS_SECTION_CLASS)
+    if job_summary_desc_list[0].h3.text.strip() == 'Job Summary':
+        summary = str(job_summary_desc_list[0])
+    else:
+        summary = NO_SUMMARY
+    if "Job Description" in job_summary_desc_list[1].h3.text.strip():
+        description = str(job_summary_desc_list[1])
+    else:
+        description = NO_DESCRIPTION
+    return summary, description
+
+
+# Returns the raw html of a detail page's job__details article, found by
+# plain string search rather than parsing, or None if there isn't one
+def details_article(html):
+    opening = DETAILS_ARTICLE_OPEN.search(html)
+    if opening is None:
+        return None
+    depth = 1
+    for tag in ARTICLE_TAG.finditer(html, opening.end()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return html[opening.start():html.index('>', tag.end()) + 1]
+    return None
@@ -0,0 +1,54 @@
+###
+#    Listing page prefetching.
+#
+#    While the scraper parses page N and fetches its detail pages, the next
+#    `lookahead` listing pages are already being fetched in the background
+#    with their own fetcher (plain HTTP or a second browser), so network
+#    latency overlaps with the work on the current page.
+###
+
+from collections import OrderedDict
+
+PREFETCH_BACKENDS = ('http', 'browser')
+
+
+class Prefetcher:
+    """ Runs fetch(url) for upcoming pages on background threads and hands
+        the results over when the scraper gets to them
+        Logic: A browser can only load one page at a time, so a prefetcher
+        wrapping one should get a single worker
+    """
+
+    def __init__(self, fetch, lookahead=1, workers=None):
+        from concurrent.futures import ThreadPoolExecutor
+        self.fetch = fetch
+        self.lookahead = lookahead
+        self.executor = ThreadPoolExecutor(max_workers=workers or lookahead, thread_name_prefix='prefetch')
+        # url -> Future, in the order they were scheduled
+        self.pending = OrderedDict()
+        self.hits = 0
+
+    # Starts fetching the given urls, skipping those already under way
+    def schedule(self, urls):
+        for url in urls:
+            if url not in self.pending:
+                self.pending[url] = self.executor.submit(self.fetch, url)
+
+    # Returns the prefetched html of `url`, waiting for it if needed, or None
+    # if it wasn't prefetched. A failed prefetch raises its error.
+    def take(self, url):
+        future = self.pending.pop(url, None)
+        if future is None:
+            return None
+        html = future.result()
+        self.hits += 1
+        return html
+
+    def cancel(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+    def close(self):
+        self.cancel()
+        self.executor.shutdown(wait=True)
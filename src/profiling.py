@@ -0,0 +1,151 @@
+###
+#    Profiling hooks for scrape and search runs.
+#
+#    `Profiler('cpu', ...)` wraps a run in cProfile and writes the top-N
+#    functions by cumulative time. `Profiler('mem', ...)` wraps it in
+#    tracemalloc, takes a snapshot after every scraped page and writes the
+#    top-N allocation sites overall and per page.
+#
+#    `install_dump_handler()` makes SIGUSR1 print the current stack of every
+#    thread and the stage timers of a running scrape without stopping it:
+#
+#        kill -USR1 <pid>
+###
+
+from datetime import datetime
+from io import StringIO
+import os
+import signal
+import sys
+import threading
+
+# cProfile, pstats, tracemalloc and traceback are imported when a profile
+# or dump is actually taken; most runs never need them
+
+PROFILE_MODES = ('cpu', 'mem')
+
+# Stack frames kept per allocation; more frames give better attribution
+# at the cost of tracemalloc overhead
+MEM_FRAMES = 5
+
+
+def default_output(mode):
+    return 'bmscraper_profile_{}_{}.txt'.format(mode, datetime.now().strftime('%Y%m%d-%H%M%S'))
+
+
+class Profiler:
+    """ Profiles everything between start() and stop() and writes a report
+        to `output` when stopped
+    """
+
+    def __init__(self, mode, output=None, top=25):
+        if mode not in PROFILE_MODES:
+            raise ValueError('Profile mode must be one of: {}'.format(', '.join(PROFILE_MODES)))
+        self.mode = mode
+        self.output = output or default_output(mode)
+        self.top = top
+        self.profile = None
+        # (label, current bytes, peak bytes, top allocation diffs) per page
+        self.pages = []
+        self.last_snapshot = None
+
+    def start(self):
+        if self.mode == 'cpu':
+            import cProfile
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            import tracemalloc
+            tracemalloc.start(MEM_FRAMES)
+            self.last_snapshot = tracemalloc.take_snapshot()
+
+    # Records memory growth since the previous page; a no-op for cpu profiles
+    def page_snapshot(self, label):
+        if self.mode != 'mem':
+            return
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        diffs = snapshot.compare_to(self.last_snapshot, 'lineno')[:self.top]
+        self.pages.append((label, current, peak, diffs))
+        self.last_snapshot = snapshot
+
+    def stop(self):
+        with open(self.output, 'w') as f:
+            if self.mode == 'cpu':
+                self.profile.disable()
+                self._write_cpu(f)
+            else:
+                import tracemalloc
+                self._write_mem(f)
+                tracemalloc.stop()
+        print('{} profile saved to file: {}'.format(self.mode.upper(), self.output))
+
+    def _write_cpu(self, f):
+        import pstats
+        # Keep the raw profile too, for snakeviz and friends
+        self.profile.dump_stats(os.path.splitext(self.output)[0] + '.prof')
+        f.write('Top {} functions by cumulative time\n\n'.format(self.top))
+        pstats.Stats(self.profile, stream=f).sort_stats('cumulative').print_stats(self.top)
+        f.write('\nTop {} functions by own time\n\n'.format(self.top))
+        pstats.Stats(self.profile, stream=f).sort_stats('tottime').print_stats(self.top)
+
+    def _write_mem(self, f):
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        f.write('Traced memory: current {:.1f} MiB, peak {:.1f} MiB\n\n'.format(current / 2 ** 20, peak / 2 ** 20))
+        f.write('Top {} allocation sites\n\n'.format(self.top))
+        for stat in snapshot.statistics('traceback')[:self.top]:
+            f.write('{}\n'.format(stat))
+            for line in stat.traceback.format():
+                f.write('    {}\n'.format(line))
+
+        for label, current, peak, diffs in self.pages:
+            f.write('\nAfter page {}: current {:.1f} MiB, peak {:.1f} MiB, top growth:\n'.format(
+                label, current / 2 ** 20, peak / 2 ** 20))
+            for diff in diffs:
+                f.write('    {}\n'.format(diff))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+# Writes the stack of every running thread, followed by the stage timers
+# of `stats` (an Instrumentation) when given. `frame` is where the main
+# thread was interrupted, so the dump doesn't just show the signal handler.
+def dump_state(stats=None, file=None, frame=None):
+    import traceback
+    file = file or sys.stderr
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    frames = sys._current_frames()
+    if frame is not None:
+        frames[threading.main_thread().ident] = frame
+    file.write('\n---- bmscraper state at {} ----\n'.format(datetime.now().isoformat()))
+    for ident, frame in frames.items():
+        file.write('\nThread {} ({}):\n'.format(names.get(ident, '?'), ident))
+        file.write(''.join(traceback.format_stack(frame)))
+    if stats is not None:
+        file.write('\n')
+        buffer = StringIO()
+        stats.print_summary(file=buffer)
+        file.write(buffer.getvalue())
+    file.write('---- end of state ----\n')
+    file.flush()
+
+
+# Dumps state on SIGUSR1. `get_stats` is called at signal time so the
+# handler always reports the run in progress. Does nothing on platforms
+# without SIGUSR1.
+def install_dump_handler(get_stats=None, file=None):
+    if not hasattr(signal, 'SIGUSR1'):
+        return False
+    signal.signal(signal.SIGUSR1, lambda signum, frame: dump_state(
+        get_stats() if get_stats else None, file, frame))
+    return True
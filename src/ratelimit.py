@@ -0,0 +1,125 @@
+###
+#    Adaptive per-host rate limiting for page fetches.
+#
+#    Every host gets a token bucket whose rate is tuned with AIMD (additive
+#    increase, multiplicative decrease): each healthy, fast response nudges
+#    the rate up a little, while a 429/503, a timeout or a response much
+#    slower than usual halves it. One limiter is shared by every fetcher, for
+#    listing and detail pages alike, so they all back off together.
+###
+
+from threading import Lock
+from time import monotonic, sleep
+from urllib.parse import urlsplit
+
+from retry import HTTP_429, HTTP_5XX, NETWORK, TIMEOUT
+
+# Error kinds (see retry.classify_error) that mean the site is struggling
+CONGESTION_ERRORS = {HTTP_429, HTTP_5XX, TIMEOUT, NETWORK}
+
+
+class TokenBucket:
+    """ Hands out one token per request at `rate` tokens per second, with up
+        to `capacity` saved up for bursts
+        Logic: Tokens are reserved under the caller's lock and may go
+        negative; the caller then sleeps off its own wait outside the lock,
+        so concurrent callers queue up fairly
+    """
+
+    def __init__(self, rate, capacity=1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+
+    # Takes a token and returns how long to wait before using it
+    def reserve(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class HostState:
+
+    def __init__(self, rate, capacity):
+        self.bucket = TokenBucket(rate, capacity)
+        # Exponentially weighted moving average of response times
+        self.latency = None
+        self.last_decrease = 0.0
+
+
+class AdaptiveRateLimiter:
+    """ Token-bucket limiter per host with AIMD rate adjustment
+    """
+
+    def __init__(self, rate=1.0, min_rate=0.1, max_rate=5.0, increase=0.1, decrease=0.5, burst=1.0,
+            slow_factor=2.0, slow_latency=10.0, metrics=None, sleep=sleep):
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        # Requests/sec added after every healthy response
+        self.increase = increase
+        # Rate multiplier when the site shows signs of strain
+        self.decrease = decrease
+        self.burst = burst
+        # A response is "slow" when it takes slow_factor times the average,
+        # or longer than slow_latency seconds
+        self.slow_factor = slow_factor
+        self.slow_latency = slow_latency
+        self.metrics = metrics
+        self.sleep = sleep
+        self.hosts = {}
+        self.lock = Lock()
+
+    def _state(self, url):
+        host = urlsplit(url).netloc
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self.initial_rate, self.burst)
+            self._report(host, state)
+        return host, state
+
+    def _report(self, host, state):
+        if self.metrics is not None:
+            self.metrics.set_rate(host, state.bucket.rate)
+
+    def rate(self, url):
+        with self.lock:
+            return self._state(url)[1].bucket.rate
+
+    # Blocks until a request to `url` is allowed; returns the time waited
+    def acquire(self, url):
+        with self.lock:
+            wait = self._state(url)[1].bucket.reserve(monotonic())
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    # Feeds the outcome of a request back into its host's rate. `error_kind`
+    # is a retry.classify_error() kind for failed requests.
+    def observe(self, url, seconds, status=None, error_kind=None):
+        with self.lock:
+            host, state = self._state(url)
+            bucket = state.bucket
+            slow = state.latency is not None and seconds > max(state.latency * self.slow_factor, 0.5) \
+                    or seconds > self.slow_latency
+            congested = status in (429, 503) or error_kind in CONGESTION_ERRORS or slow
+
+            if congested:
+                # Back off at most once per current request interval, so a
+                # burst of failures from requests already in flight doesn't
+                # collapse the rate to the floor
+                now = monotonic()
+                if now - state.last_decrease >= 1 / bucket.rate:
+                    bucket.rate = max(self.min_rate, round(bucket.rate * self.decrease, 3))
+                    state.last_decrease = now
+            elif error_kind is None:
+                bucket.rate = min(self.max_rate, round(bucket.rate + self.increase, 3))
+
+            # Only successful responses say how fast the site normally is
+            if error_kind is None:
+                state.latency = seconds if state.latency is None else 0.8 * state.latency + 0.2 * seconds
+            self._report(host, state)
@@ -0,0 +1,99 @@
+###
+#    LRU cache for search results.
+#
+#    Cache keys combine a normalized query with a fingerprint of the snapshot
+#    file it ran against (mtime, size and content hash), so entries stop
+#    matching as soon as a new scrape replaces the file.
+###
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+
+# (path, mtime, size) -> content hash, so a file is only hashed once per change
+_hashes = {}
+
+
+# Returns a fingerprint string for the snapshot file, e.g.
+# '1687883470123456789-84213-3f2a...'
+def snapshot_fingerprint(file_name):
+    stat = os.stat(file_name)
+    marker = (os.path.abspath(file_name), stat.st_mtime_ns, stat.st_size)
+    if marker not in _hashes:
+        digest = hashlib.sha256()
+        with open(file_name, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        _hashes[marker] = digest.hexdigest()
+    return '{}-{}-{}'.format(stat.st_mtime_ns, stat.st_size, _hashes[marker])
+
+
+class ResultCache:
+    """ Least recently used cache of search results held in memory and,
+        if a directory is given, mirrored on disk so it survives restarts
+        Logic: Values are lists of job positions in the snapshot, which stay
+        valid for as long as the fingerprint in the key does
+    """
+
+    def __init__(self, max_entries=256, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + '.json')
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        if self.cache_dir:
+            try:
+                with open(self._path(key), 'r') as f:
+                    stored = json.load(f)
+                # Guard against the (unlikely) file name collision
+                if tuple(stored['key']) == key:
+                    self._remember(key, stored['value'])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return stored['value']
+            except (OSError, ValueError, KeyError):
+                pass
+
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.cache_dir:
+            # Write to a temporary file first so readers never see half a file
+            path = self._path(key)
+            with open(path + '.tmp', 'w') as f:
+                json.dump({'key': key, 'value': value}, f)
+            os.replace(path + '.tmp', path)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return OrderedDict([
+            ('hits', self.hits),
+            ('disk_hits', self.disk_hits),
+            ('misses', self.misses),
+            ('hit_ratio', self.hits / lookups if lookups else 0.0),
+            ('entries', len(self.entries)),
+        ])
@@ -0,0 +1,133 @@
+###
+#    Retry policy for page and detail fetches.
+#
+#    Errors are classified as transient (timeouts, network errors, HTTP 429
+#    and 5xx, elements missing from a half-rendered page) or permanent.
+#    Transient errors are retried with jittered exponential backoff; what
+#    still fails ends up in a dead-letter list for a later re-fetch.
+###
+
+from collections import OrderedDict
+from datetime import datetime
+from time import sleep
+import json
+import os
+import random
+import socket
+import urllib.error
+
+TIMEOUT = 'timeout'
+NETWORK = 'network'
+HTTP_429 = 'http_429'
+HTTP_5XX = 'http_5xx'
+HTTP_4XX = 'http_4xx'
+MISSING_ELEMENT = 'missing_element'
+PERMANENT = 'permanent'
+
+TRANSIENT_ERRORS = {TIMEOUT, NETWORK, HTTP_429, HTTP_5XX, MISSING_ELEMENT}
+
+
+class PageError(Exception):
+    """ A page loaded but isn't usable, with the kind of error it counts as
+    """
+
+    def __init__(self, error_kind, message):
+        super().__init__(message)
+        self.error_kind = error_kind
+
+
+# Names the kind of failure behind an exception. Selenium exceptions are
+# matched by class name so this module doesn't need selenium installed.
+def classify_error(error):
+    kind = getattr(error, 'error_kind', None)
+    if kind:
+        return kind
+
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if isinstance(error, urllib.error.HTTPError):
+        if error.code == 429:
+            return HTTP_429
+        if error.code >= 500:
+            return HTTP_5XX
+        return HTTP_4XX
+    if isinstance(error, (socket.timeout, TimeoutError)) or 'TimeoutException' in names:
+        return TIMEOUT
+    if isinstance(error, urllib.error.URLError):
+        return TIMEOUT if isinstance(error.reason, (socket.timeout, TimeoutError)) else NETWORK
+    if isinstance(error, ConnectionError):
+        return NETWORK
+    # Selenium reports connection problems as 'net::ERR_...' messages
+    if 'WebDriverException' in names and 'net::ERR' in str(error):
+        return NETWORK
+    # An element we expected isn't there (yet), e.g. the page hadn't
+    # finished rendering
+    if 'NoSuchElementException' in names or isinstance(error, (AttributeError, IndexError)):
+        return MISSING_ELEMENT
+    return PERMANENT
+
+
+def is_transient(error):
+    return classify_error(error) in TRANSIENT_ERRORS
+
+
+class RetryPolicy:
+    """ Retries transient failures with exponential backoff and full jitter:
+        the n-th retry waits a random time between 0 and
+        min(max_delay, base_delay * 2 ** n) seconds
+    """
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=30.0, sleep=sleep):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+
+    def delay(self, retry):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+    # Calls func(*args) until it succeeds, the error is permanent or the
+    # attempts run out; the last error is re-raised with `attempts` and
+    # `error_kind` attributes set. `on_retry(error, kind, attempt, delay)`
+    # is called before every wait.
+    def call(self, func, *args, on_retry=None):
+        attempt = 1
+        while True:
+            try:
+                return func(*args)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in TRANSIENT_ERRORS or attempt >= self.max_attempts:
+                    e.attempts = attempt
+                    e.error_kind = kind
+                    raise
+                delay = self.delay(attempt - 1)
+                if on_retry is not None:
+                    on_retry(e, kind, attempt, delay)
+                self.sleep(delay)
+                attempt += 1
+
+
+class DeadLetters:
+    """ URLs that kept failing, with why, for a later re-fetch
+    """
+
+    def __init__(self):
+        self.entries = []
+
+    def add(self, url, error, kind='page'):
+        self.entries.append(OrderedDict([
+            ('url', url),
+            ('kind', kind),
+            ('error_kind', classify_error(error)),
+            ('error', str(error).strip().split('\n')[0]),
+            ('attempts', getattr(error, 'attempts', 1)),
+            ('failed_at', datetime.now().isoformat()),
+        ]))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def save(self, file_name):
+        with open(file_name + '.tmp', 'w') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(file_name + '.tmp', file_name)
@@ -0,0 +1,781 @@
+###
+#    The scraper: drives the browser (or the HTTP fetcher, a page cache or a
+#    recorded archive) through the listing pages of a category, extracts
+#    every job with its details and saves them as a snapshot.
+#
+#    bmscraper.py only imports this module once a scrape is asked for, so
+#    searches never load selenium, bs4 and the rest of the scraping stack.
+###
+
+from time import sleep, perf_counter, time
+
+from blocking import DEFAULT_BLOCK_PROFILE, apply_blocking, format_bytes, page_weight
+from categories import DEFAULT_CATEGORY, category_url, scrape_categories
+from detailmemo import article_digest
+from driver import DriverManager
+from fetch import HttpFetcher
+from instrument import Instrumentation
+from metrics import write_textfile
+from prefetch import Prefetcher
+from ratelimit import AdaptiveRateLimiter
+from parse import NO_DESCRIPTION, NO_SUMMARY, find_job_sections, has_next_page, is_featured, \
+        make_soup, parse_job_card, parse_job_details
+from retry import MISSING_ELEMENT, DeadLetters, PageError, RetryPolicy, classify_error
+from store import dead_letters_path, save_jobs, snapshot_path, snapshot_timestamp
+
+BASE_URL = 'https://brightermonday.co.ke/'
+JOBS_URL = category_url(BASE_URL, DEFAULT_CATEGORY)
+
+# Listing pages that may fail in a row before a run gives up
+MAX_CONSECUTIVE_PAGE_FAILURES = 3
+
+
+# json file name regex
+# '^(brightermondayjobs)\_[0-9]{8,8}\-[0-9]{6,6}\.(json)$'
+# Matches, e.g. brightermondayjobs_20161114-103302.json
+
+class BrighterMondayJobsScraper:
+    """ Scrapes and stores all job listings from brightermonday.co.ke into a file as json objects
+        Logic: The data will be ready for consumption by programs written in other languages
+        apart from Python
+    """
+
+    def __init__(self, pages = 5, report_file = None, metrics = None, metrics_file = None, profiler = None,
+            checkpoint = None, checkpoint_every = 1, retry = None, http_fetcher = None, rate_limiter = None,
+            block_profile = DEFAULT_BLOCK_PROFILE, blocking_stats = None, driver_manager = None, session = None,
+            page_cache = None, offline_source = None, archive = None, http_cache = None, detail_memo = None,
+            prefetch = 0, prefetch_with = 'http', jobs_url = JOBS_URL, category = None, seen_links = None,
+            stats = None, store_dir = '.', incremental = False, keep_browser = False, stop_event = None,
+            known_links = None):
+        self.pages = pages
+        # Where snapshots are saved
+        self.store_dir = store_dir
+        # Set by the daemon (see daemon.py): an incremental scrape stops at
+        # the first listing page with nothing but jobs in `known_links`, the
+        # links in the store when the run started, the browser is kept open
+        # for the next run, and setting `stop_event` ends the scrape after
+        # the page in progress
+        self.incremental = incremental
+        self.known_links = known_links
+        self.keep_browser = keep_browser
+        self.stop_event = stop_event
+        # The category's listing pages, and its name when several categories
+        # are scraped side by side, sharing `seen_links` (a
+        # categories.SeenLinks) so every job is kept once
+        self.jobs_url = jobs_url
+        self.category = category
+        self.seen_links = seen_links
+        # Optional detailmemo.DetailMemo reusing extractions of detail pages
+        # whose content hasn't changed
+        self.detail_memo = detail_memo
+        # Optional httpcache.DetailCache making HTTP detail fetches
+        # conditional
+        self.http_cache = http_cache
+        # Optional archive.ArchiveWriter recording every fetch for --replay
+        self.archive = archive
+        # Optional pagecache.PageCache that keeps every fetched page
+        self.page_cache = page_cache
+        # Where pages come from instead of the site when set, e.g. a
+        # PageCache for --reparse or a ReplaySource for --replay; anything
+        # with a get(url) returning html
+        self.offline_source = offline_source
+        # Optional session.SessionStore with the cookies and consent state of
+        # the last run, restored before the first page load
+        self.session = session
+        # (cookies, consent given) of this run's browser, taken before it quits
+        self.session_state = None
+        # Resources the browser doesn't download (see blocking.BLOCK_PROFILES),
+        # and where what that saves is tracked across runs
+        self.block_profile = block_profile
+        self.blocking_stats = blocking_stats
+        # Starts, recycles and restarts the browser
+        self.drivers = driver_manager or DriverManager(block_profile)
+        # Optional prefetch.Prefetcher loading the next `prefetch` listing
+        # pages in the background, over HTTP or in a browser of its own
+        self.prefetcher = None
+        self.prefetch_fetcher = None
+        self.prefetch_drivers = None
+        # Cookies the prefetching browser starts with
+        self.prefetch_cookies = []
+        if prefetch:
+            if prefetch_with == 'browser':
+                # A second Chrome can't share the main one's profile folder
+                self.prefetch_drivers = DriverManager(block_profile, self.drivers.headless, self.drivers.recycle_pages,
+                        self.drivers.max_rss_mb, resolver=self.drivers.resolver)
+                self.prefetcher = Prefetcher(self.prefetch_in_browser, prefetch, workers=1)
+            else:
+                self.prefetch_fetcher = HttpFetcher()
+                self.prefetcher = Prefetcher(self.prefetch_over_http, prefetch)
+        # Paces listing and detail fetches alike, speeding up while the site
+        # responds quickly and backing off when it struggles
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(metrics=metrics)
+        # How transient page and detail failures are retried, and where
+        # URLs that keep failing are kept for a later re-fetch
+        self.retry = retry or RetryPolicy()
+        self.dead_letters = DeadLetters()
+        self.pending_details = []
+        self.pending_pages = []
+        # Optional fetch.HttpFetcher used for detail pages instead of a
+        # second browser window
+        self.http_fetcher = http_fetcher
+        # Optional checkpoint.Checkpoint, saved every `checkpoint_every` pages
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        # Optional profiling.Profiler, told about every finished page
+        self.profiler = profiler
+        # Stage timers and counters for the current run, mirrored into
+        # Prometheus metrics when given
+        self.metrics = metrics
+        self.metrics_file = metrics_file
+        self.stats = stats or Instrumentation(metrics)
+        self.drivers.stats = self.stats
+        self.report_file = report_file
+
+    # Will be toggled accordingly in case of errors while scraping for data
+    scraping_error = False
+
+    # The browser, started on first use by the driver manager
+    @property
+    def driver(self):
+        return self.drivers.start()
+
+    # Records how long the page the browser just loaded took and how many
+    # bytes it pulled in
+    def record_page_weight(self):
+        weight = page_weight(self.driver)
+        if weight is not None:
+            seconds, bytes_transferred, resources = weight
+            self.stats.observe('page_load', seconds)
+            self.stats.count('bytes_transferred', bytes_transferred)
+
+    # Loads the saved cookies into the browser and the HTTP fetcher before
+    # anything is fetched
+    def restore_session(self):
+        if self.session is None or not self.session.cookies:
+            return
+        print('>>> Restoring session saved at {} ({} cookies{})'.format(self.session.saved_at,
+            len(self.session.cookies), ', consent given' if self.session.consent_given else ''))
+        with self.stats.stage('session_restore'):
+            self.drivers.start()
+            self.drivers.set_cookies(self.session.cookies)
+            self.drivers.consent_given = self.session.consent_given
+        self.share_cookies(self.session.cookies)
+
+    # Hands the browser's cookies to the fetchers working next to it
+    def share_cookies(self, cookies):
+        if self.http_fetcher is not None:
+            self.http_fetcher.set_cookies(cookies)
+        if self.prefetch_fetcher is not None:
+            self.prefetch_fetcher.set_cookies(cookies)
+        self.prefetch_cookies = list(cookies)
+
+    # Takes the browser's cookies and consent state while it still runs
+    def collect_session(self):
+        if self.session is None or self.drivers.driver is None:
+            return
+        try:
+            self.session_state = (self.drivers.driver.get_cookies(), self.drivers.consent_given)
+        except Exception as e:
+            print('>>> Could not read session state: {}'.format(e))
+
+    # Saves the collected cookies and consent state for the next run
+    def save_session(self):
+        if self.session_state is None:
+            return
+        try:
+            self.session.update(*self.session_state)
+            self.session.save()
+        except Exception as e:
+            print('>>> Could not save session state: {}'.format(e))
+
+    # Calls fetch(url) once the rate limiter allows it and reports how long
+    # it took, or how it failed, back to the limiter
+    def rate_limited(self, url, fetch):
+        with self.stats.stage('rate_limit_wait'):
+            self.rate_limiter.acquire(url)
+        started = perf_counter()
+        try:
+            result = fetch(url)
+        except Exception as e:
+            self.rate_limiter.observe(url, perf_counter() - started, error_kind=classify_error(e))
+            if self.archive is not None:
+                self.archive.record_error(url, e)
+            raise
+        self.rate_limiter.observe(url, perf_counter() - started)
+        return result
+
+    # Loads the given listing page in the main window
+    def open_jobs_page(self, page):
+        with self.stats.stage('driver_get'):
+            self.rate_limited(self.jobs_page_url(page), self.driver.get)
+        self.record_page_weight()
+
+    def jobs_page_url(self, page):
+        return self.jobs_url if page == 1 else self.jobs_url + '?page=' + str(page)
+
+    # Returns the parsed listing page and its job cards, loading it first
+    # unless it is the page the browser is already showing
+    def load_listing_page(self, page, navigate):
+        if self.offline_source is not None:
+            with self.stats.stage('page_source'):
+                page_source = self.offline_source.get(self.jobs_page_url(page))
+        else:
+            page_source = None
+            if navigate and self.prefetcher is not None:
+                with self.stats.stage('prefetch_wait'):
+                    page_source = self.prefetcher.take(self.jobs_page_url(page))
+                if page_source is not None:
+                    self.stats.count('prefetch_hits')
+            if page_source is None:
+                if navigate:
+                    self.open_jobs_page(page)
+                with self.stats.stage('page_source'):
+                    page_source = self.driver.page_source
+            self.keep_page(self.jobs_page_url(page), page_source, 'listing')
+        with self.stats.stage('parse_listing'):
+            soup = make_soup(page_source)
+            job_sections = find_job_sections(soup)
+        # An empty page is most likely one that hasn't finished rendering
+        if not job_sections:
+            raise PageError(MISSING_ELEMENT, 'No job listings found on page {}'.format(page))
+        return soup, job_sections
+
+    # Fetch functions for the prefetcher, run on its threads
+    def prefetch_over_http(self, url):
+        with self.stats.stage('prefetch_get'):
+            return self.rate_limited(url, self.prefetch_fetcher.get)
+
+    def prefetch_in_browser(self, url):
+        drivers = self.prefetch_drivers
+        if drivers.driver is None:
+            drivers.start()
+            drivers.set_cookies(self.prefetch_cookies)
+        with self.stats.stage('prefetch_get'):
+            self.rate_limited(url, drivers.driver.get)
+        page_source = drivers.driver.page_source
+        drivers.page_done()
+        return page_source
+
+    # Starts prefetching the listing pages after `page`
+    def prefetch_after(self, page):
+        last = min(page + self.prefetcher.lookahead, self.pages)
+        self.prefetcher.schedule([self.jobs_page_url(next_page) for next_page in range(page + 1, last + 1)])
+
+    # load_listing_page() with retries; a retried page is always reloaded
+    def load_listing_page_with_retry(self, page, navigate):
+        attempts = []
+
+        def load():
+            attempts.append(page)
+            return self.load_listing_page(page, navigate or len(attempts) > 1)
+
+        return self.retry.call(load, on_retry=self.log_retry)
+
+    # Stores a fetched page in the page cache and the archive being
+    # recorded, if any. `response` is the fetch.Response of HTTP fetches.
+    def keep_page(self, url, html, kind, response=None):
+        if self.page_cache is not None:
+            with self.stats.stage('page_cache_put'):
+                self.page_cache.put(url, html, kind)
+        if self.archive is not None:
+            with self.stats.stage('archive_write'):
+                if response is not None:
+                    self.archive.record_response(response, kind)
+                else:
+                    self.archive.record_page(url, html, kind)
+
+    # Returns the html of a job's detail page, over plain HTTP if enabled or
+    # else in a second browser window
+    def get_detail_source(self, link):
+        if self.offline_source is not None:
+            return self.offline_source.get(link)
+        if self.http_fetcher is not None:
+            with self.stats.stage('detail_get'):
+                response = self.rate_limited(link, self.http_fetcher.fetch)
+            self.keep_page(link, response.text, 'detail', response)
+            return response.text
+        detail_source = self.browser_detail_source(link)
+        self.keep_page(link, detail_source, 'detail')
+        return detail_source
+
+    def browser_detail_source(self, link):
+        # use selenium to launch another window to fetch content from the job link
+        # then close the window
+        with self.stats.stage('detail_window_open'):
+            self.driver.execute_script("window.open('');")
+            self.driver.switch_to.window(self.driver.window_handles[1])
+        try:
+            apply_blocking(self.driver, self.block_profile)
+            with self.stats.stage('detail_get'):
+                self.rate_limited(link, self.driver.get)
+            self.record_page_weight()
+            with self.stats.stage('detail_page_source'):
+                return self.driver.page_source
+        finally:
+            # Always get back to the listing window, even after an error
+            with self.stats.stage('detail_window_close'):
+                self.driver.close()
+                self.driver.switch_to.window(self.driver.window_handles[0])
+
+    def get_job_details(self, link):
+        # A recorded run fetches every page in full so the archive can be
+        # replayed on its own
+        if self.http_cache is not None and self.http_fetcher is not None and self.offline_source is None \
+                and self.archive is None:
+            return self.get_job_details_conditional(link)
+        return self.extract_details(link, self.get_detail_source(link))
+
+    # Returns (summary, description) from a detail page, straight from the
+    # memo if its job__details article was seen before
+    def extract_details(self, link, html):
+        if self.detail_memo is None:
+            with self.stats.stage('parse_detail'):
+                return parse_job_details(html)
+        with self.stats.stage('detail_hash'):
+            digest = article_digest(html)
+        if digest is not None:
+            details, changed = self.detail_memo.lookup(link, digest)
+            if changed:
+                self.stats.count('detail_changes')
+            if details is not None:
+                self.stats.count('detail_memo_hits')
+                return details
+        with self.stats.stage('parse_detail'):
+            summary, description = parse_job_details(html)
+        if digest is not None:
+            self.detail_memo.store(link, digest, summary, description)
+        return summary, description
+
+    # Fetches a detail page with the validators of the last fetch and reuses
+    # the stored summary and description if the server says it's unchanged
+    def get_job_details_conditional(self, link):
+        validators = self.http_cache.validators(link)
+        with self.stats.stage('detail_get'):
+            response = self.rate_limited(link, lambda url: self.http_fetcher.fetch(url, validators))
+        details = self.http_cache.lookup(link, response)
+        if details is not None:
+            self.stats.count('http_cache_hits')
+            return details
+        self.stats.count('http_cache_misses')
+        self.keep_page(link, response.text, 'detail', response)
+        summary, description = self.extract_details(link, response.text)
+        self.http_cache.store(link, response, summary, description)
+        return summary, description
+
+    def log_retry(self, error, kind, attempt, delay):
+        print('>>> {} ({}), retrying in {:.1f}s [attempt {}/{}]'.format(
+            str(error).strip().split('\n')[0], kind, delay, attempt + 1, self.retry.max_attempts))
+        self.stats.count('retries')
+
+    # Fills in the job's summary and description from its detail page,
+    # retrying transient failures. Returns False if it still failed.
+    def fetch_job_details(self, job):
+        with self.stats.stage('detail_total'):
+            try:
+                job['Summary'], job['Description'] = self.retry.call(
+                        self.get_job_details, job['Link'], on_retry=self.log_retry)
+                return True
+            except Exception as e:
+                print('>>> Error fetching job summary and description')
+                print(e)
+                self.stats.count('detail_errors')
+                self.dead_letters.add(job['Link'], e, 'detail')
+                self.stats.count('dead_letters')
+                job['Summary'] = NO_SUMMARY
+                job['Description'] = NO_DESCRIPTION
+                return False
+
+    # Adds the jobs on a parsed listing page to `jobs` and returns how many
+    # were added or, given `known_links`, how many weren't among them. A
+    # card that can't be parsed is skipped instead of ending the run.
+    def extract_jobs(self, job_sections, jobs, pending_details):
+        added = 0
+        unknown = 0
+        for job_section in job_sections:
+
+            # Skip featured jobs
+            if is_featured(job_section):
+                print('>>> Skipping featured job')
+                self.stats.count('featured_skipped')
+                continue
+
+            try:
+                with self.stats.stage('extract_card'):
+                    job = parse_job_card(job_section)
+            except (AttributeError, IndexError) as e:
+                print('>>> Skipping job card that could not be parsed: {}'.format(e))
+                self.stats.count('card_errors')
+                continue
+
+            # Counted before the check below: a job another category claimed
+            # earlier in this run is still new to the store
+            if self.known_links is not None and job['Link'] not in self.known_links:
+                unknown += 1
+
+            # Another category already has this job
+            if self.seen_links is not None and job['Link'] != 'No link available' and \
+                    not self.seen_links.claim(job['Link']):
+                self.stats.count('duplicates_skipped')
+                continue
+
+            if job['Link'] != 'No link available':
+                if not self.fetch_job_details(job):
+                    pending_details.append(job['Link'])
+
+            # Add scraped data to `jobs` array
+            jobs.append(job)
+            self.stats.count('jobs')
+            added += 1
+        return added if self.known_links is None else unknown
+
+    # The main scraping function
+    def scrape_jobs(self):
+        stats = self.stats
+        checkpoint = self.checkpoint
+
+        # Array to store scraped jobs as Collections.OrderedDict
+        jobs = []
+        # Links of jobs whose detail page couldn't be fetched yet
+        pending_details = []
+        # Listing pages that couldn't be loaded yet
+        pending_pages = []
+        start_page = 1
+
+        # Pick up where an earlier run stopped
+        if checkpoint is not None and checkpoint.last_completed_page:
+            jobs = checkpoint.jobs
+            pending_details = checkpoint.pending_details
+            pending_pages = checkpoint.pending_pages
+            start_page = checkpoint.next_page()
+            if self.seen_links is not None:
+                self.seen_links.add_all(job['Link'] for job in jobs)
+            print('>>> Resuming after page {} with {} jobs scraped and {} pages and {} detail pages pending'.format(
+                checkpoint.last_completed_page, len(jobs), len(pending_pages), len(pending_details)))
+            if start_page > self.pages and not pending_details and not pending_pages:
+                return jobs
+
+        # Offline runs read every page from their source, no browser needed
+        loaded_page = None
+        if self.offline_source is None:
+            from selenium.webdriver.common.by import By
+            self.restore_session()
+            # A finished listing only has pending pages left; page 1 is
+            # sure to exist for the consent check
+            loaded_page = start_page if start_page <= self.pages else 1
+            self.open_jobs_page(loaded_page)
+
+        # wait for page to load, check for the cookie consent section
+        # and programmatically click the agree button. A restarted browser,
+        # or a restored session, keeps the consent cookies, so this is only
+        # needed once. No banner means the browser profile still has them.
+
+        if loaded_page is not None and not self.drivers.consent_given:
+            cookie_agree_buttons = self.driver.find_elements(By.ID, 'onetrust-accept-btn-handler')
+            if cookie_agree_buttons:
+                print('>>> Found cookie agree button')
+                cookie_agree_buttons[0].click()
+                print('>>> Cookie agree button clicked. Waiting for 5 seconds to begin scraping...')
+                with stats.stage('consent_sleep'):
+                    sleep(5);
+            else:
+                print('>>> No cookie consent banner, consent was already given')
+            self.drivers.consent_given = True
+            self.share_cookies(self.driver.get_cookies())
+
+        def save_progress(page):
+            if checkpoint is not None:
+                checkpoint.page_done(page, jobs, pending_details, pending_pages)
+                with stats.stage('checkpoint_save'):
+                    checkpoint.save()
+
+        # The listing has no pages left to scrape: record it as done up to
+        # the last page asked for, so --resume only re-fetches what is
+        # pending instead of loading pages that don't exist
+        def listing_done():
+            if checkpoint is not None:
+                checkpoint.page_done(self.pages, jobs, pending_details, pending_pages)
+
+        # Retry pages and detail pages that failed in the run being resumed
+        if pending_pages or pending_details:
+            retry_pages, pending_pages = pending_pages, []
+            for page in retry_pages:
+                print('>>> Fetching pending listing page {}...'.format(page))
+                try:
+                    soup, job_sections = self.load_listing_page_with_retry(page, True)
+                except Exception as e:
+                    self.dead_letters.add(self.jobs_page_url(page), e)
+                    stats.count('dead_letters')
+                    pending_pages.append(page)
+                    continue
+                self.extract_jobs(job_sections, jobs, pending_details)
+                stats.count('pages')
+                # A restarted browser no longer shows the first page
+                if self.drivers.page_done():
+                    loaded_page = None
+
+            print('>>> Fetching {} pending job detail pages...'.format(len(pending_details)))
+            jobs_by_link = {job['Link']: job for job in jobs}
+            pending_details = [link for link in pending_details
+                    if link in jobs_by_link and not self.fetch_job_details(jobs_by_link[link])]
+            save_progress(start_page - 1)
+
+        page = start_page
+        # Stop early when several pages in a row fail; the site is most
+        # likely down and hammering it won't help
+        consecutive_failures = 0
+
+        while page <= self.pages:
+            if self.stop_event is not None and self.stop_event.is_set():
+                print('>>> Stopped before page {}'.format(page))
+                break
+            try:
+                try:
+                    soup, job_sections = self.load_listing_page_with_retry(page, page != loaded_page)
+                except Exception as e:
+                    print('<<< Could not load page {}: {} >>>'.format(page, e))
+                    stats.count('page_errors')
+                    self.dead_letters.add(self.jobs_page_url(page), e)
+                    stats.count('dead_letters')
+                    pending_pages.append(page)
+                    consecutive_failures += 1
+                    if consecutive_failures >= MAX_CONSECUTIVE_PAGE_FAILURES:
+                        self.scraping_error = True
+                        print('<<< {} pages in a row failed. Stopping. >>>'.format(consecutive_failures))
+                        save_progress(page)
+                        break
+                    # Carry on with the next page, this one is kept for a later re-fetch
+                    save_progress(page)
+                    page += 1
+                    continue
+                consecutive_failures = 0
+
+                # Fetch what comes next while this page's jobs are processed
+                if self.prefetcher is not None and has_next_page(soup):
+                    self.prefetch_after(page)
+
+                new_jobs = self.extract_jobs(job_sections, jobs, pending_details)
+                if self.category:
+                    print('Scraped page {!s} of {}'.format(page, self.category))
+                else:
+                    print("Scraped page {!s}".format(page))
+                stats.count('pages')
+                # Keep the browser's memory in check between listing pages
+                if self.drivers.page_done():
+                    loaded_page = None
+                if self.profiler is not None:
+                    self.profiler.page_snapshot(page)
+
+                # Remember progress so an interrupted run can resume here
+                if checkpoint is not None:
+                    checkpoint.page_done(page, jobs, pending_details, pending_pages)
+                    if page % self.checkpoint_every == 0:
+                        with stats.stage('checkpoint_save'):
+                            checkpoint.save()
+
+                # The rest of the listing was scraped by an earlier run
+                if self.incremental and not new_jobs and job_sections:
+                    print('No new jobs on page {}. Finishing scraping job.'.format(page))
+                    listing_done()
+                    break
+
+                # Navigate to next page if we still have more pages to
+                # scrape
+                if not has_next_page(soup):
+                    print('No other pages found. Finishing scraping job.')
+                    listing_done()
+                    break
+                if page < self.pages:
+                    print('>>> Navigating to next page and waiting for page to load...')
+                page += 1
+
+            except:
+                self.scraping_error = True
+                stats.count('page_errors')
+                print('<<< An error occured. Jobs saved so far will still be available for you to see >>>')
+                if checkpoint is not None:
+                    checkpoint.save()
+                    print('<<< Progress saved to {}. Run again with --resume to continue from page {} >>>'.format(
+                        checkpoint.file_name, checkpoint.next_page()))
+                break
+
+        self.pending_details = pending_details
+        self.pending_pages = pending_pages
+        return jobs
+
+    # Prints the bytes and load time of this run's pages and, once a run
+    # without blocking has been measured, what the blocking profile saved
+    def report_blocking(self):
+        loads = self.stats.timings.get('page_load')
+        if not loads:
+            return
+        pages = len(loads)
+        bytes_transferred = self.stats.counters.get('bytes_transferred', 0)
+        print('Blocking profile {}: {} pages loaded, {} transferred, {:.2f}s average load time'.format(
+            self.block_profile, pages, format_bytes(bytes_transferred), sum(loads) / pages))
+        if self.blocking_stats is None:
+            return
+        self.blocking_stats.record(self.block_profile, pages, bytes_transferred, sum(loads))
+        self.blocking_stats.save()
+        if self.block_profile == 'none':
+            return
+        savings = self.blocking_stats.savings(self.block_profile)
+        if savings is None:
+            print('Run once with --block none to measure what blocking saves.')
+        else:
+            bytes_saved, seconds_saved = savings
+            print('Saved about {} and {:.2f}s per page compared to --block none ({} and {:.1f}s this run)'.format(
+                format_bytes(bytes_saved), seconds_saved, format_bytes(bytes_saved * pages), seconds_saved * pages))
+
+    # Prints how many detail pages the server reported unchanged and saves
+    # the validators for the next run
+    def report_http_cache(self):
+        cache = self.http_cache
+        if cache is None or not cache.requests:
+            return
+        print('HTTP cache: {} of {} detail pages unchanged ({:.0%}), {} downloaded, {} saved'.format(
+            cache.hits, cache.requests, cache.hit_ratio(), format_bytes(cache.bytes_downloaded),
+            format_bytes(cache.bytes_saved)))
+        cache.save()
+
+    # Prints how many detail pages were unchanged or changed since they were
+    # last seen and saves the memo for the next run
+    def report_detail_memo(self):
+        memo = self.detail_memo
+        if memo is None or not memo.lookups:
+            return
+        print('Detail memo: {} of {} detail pages unchanged, {} changed{}'.format(memo.hits, memo.lookups,
+            len(memo.changes), ' (logged to {})'.format(memo.change_log) if memo.changes else ''))
+        memo.save()
+
+    def scrape(self):
+        print('Beginning scraping operation...')
+        print('Scraping {} pages...'.format(self.pages))
+        jobs = self.run_scrape()
+        self.save_results(jobs)
+        self.print_jobs_prompt(jobs)
+
+    # Runs scrape_jobs(), cleans up after it and settles the checkpoint.
+    # Scrapers running side by side leave saving the session they share to
+    # run_all(), so they don't write its file at the same time.
+    def run_scrape(self, save_session=True):
+        with self.stats.stage('scrape_jobs'):
+            try:
+                jobs = self.scrape_jobs()
+            finally:
+                self.collect_session()
+                if save_session:
+                    self.save_session()
+                if not self.keep_browser:
+                    self.drivers.quit()
+                if self.prefetcher is not None:
+                    self.prefetcher.close()
+                if self.prefetch_drivers is not None:
+                    self.prefetch_drivers.quit()
+        # Report final status of scraping operation
+        label = ' of {}'.format(self.category) if self.category else ''
+        if self.scraping_error:
+            print('Scraping{} completed but with some errors.'.format(label))
+        else:
+            print('Scraping{} completed successfully.'.format(label))
+
+        if self.checkpoint is not None:
+            if self.pending_pages or self.pending_details:
+                # Keep the checkpoint so --resume re-fetches what failed.
+                # scrape_jobs() recorded the last page it actually got to,
+                # so a run that stopped early also resumes the pages after it.
+                self.checkpoint.save()
+                print('{} pages and {} detail pages failed. Run again with --resume to re-fetch them.'.format(
+                    len(self.pending_pages), len(self.pending_details)))
+            elif not self.scraping_error:
+                # Nothing left to resume
+                self.checkpoint.remove()
+        return jobs
+
+    # Saves the jobs as a snapshot, with the URLs that failed, and reports
+    # on the run
+    def save_results(self, jobs):
+        total_jobs = len(jobs)
+        print('Scraped job listings = {} jobs'.format(total_jobs))
+
+        # Save jobs to file; an incremental run that found nothing new adds
+        # no snapshot
+        timestamp = snapshot_timestamp()
+        if jobs or not self.incremental:
+            file_name = snapshot_path(self.store_dir, timestamp)
+            print('Saving to file: {}'.format(file_name))
+            with self.stats.stage('json_dump'):
+                save_jobs(jobs, file_name)
+
+        # Save the URLs that kept failing
+        if self.dead_letters:
+            dead_letters_file = dead_letters_path(self.store_dir, timestamp)
+            self.dead_letters.save(dead_letters_file)
+            print('{} failed URLs saved to file: {}'.format(len(self.dead_letters), dead_letters_file))
+
+        # Report where the time went
+        self.stats.finish()
+        print()
+        self.stats.print_summary()
+        self.report_blocking()
+        self.report_http_cache()
+        self.report_detail_memo()
+        if self.report_file:
+            self.stats.write_report(self.report_file)
+            print('Run report saved to file: {}'.format(self.report_file))
+        if self.metrics is not None:
+            self.metrics.finish_run(time(), self.stats.elapsed(), not self.scraping_error)
+            if self.metrics_file:
+                write_textfile(self.metrics.registry, self.metrics_file)
+                print('Metrics saved to file: {}'.format(self.metrics_file))
+
+    def print_jobs_prompt(self, jobs):
+        total_jobs = len(jobs)
+
+        # Optional: Print jobs to screen
+        print()
+        print_jobs_to_screen = input('Print jobs to screen? [Y]es or [N]o: ')
+        if print_jobs_to_screen.lower() in ['y', 'yes', 'yeah']:
+            jobs_to_print = input('Enter number of jobs to print (Total Jobs = {}): '.format(total_jobs))
+            jobs_to_print = int(jobs_to_print)
+            # Print out the jobs
+            for job in jobs[:jobs_to_print]:
+                for k, v in job.items():
+                    print('{:10} : {}'.format(k, v))
+                print()
+
+            print('-----------------------------------------')
+            print('Done.')
+            print('-----------------------------------------')
+        elif print_jobs_to_screen.lower() in ['n', 'no', 'nope']:
+            print('Ok. Bye.')
+        else:
+            print('Wrong input. Exiting.')
+
+    # Scrapes several categories at once, one scraper each, and saves their
+    # jobs together as one snapshot
+    @staticmethod
+    def scrape_all(scrapers, workers=None):
+        print('Beginning scraping operation...')
+        print('Scraping {} pages in each of {} categories: {}'.format(scrapers[0].pages, len(scrapers),
+            ', '.join(scraper.category for scraper in scrapers)))
+        jobs = BrighterMondayJobsScraper.run_all(scrapers, workers)
+        scrapers[0].save_results(jobs)
+        scrapers[0].print_jobs_prompt(jobs)
+
+    # Runs one scraper, or several side by side, and leaves their errors and
+    # failed URLs with the first one, which saves the results
+    @staticmethod
+    def run_all(scrapers, workers=None):
+        if len(scrapers) == 1:
+            return scrapers[0].run_scrape()
+        jobs = scrape_categories(scrapers, workers)
+        lead = scrapers[0]
+        lead.scraping_error = any(scraper.scraping_error for scraper in scrapers)
+        for scraper in scrapers[1:]:
+            lead.dead_letters.entries.extend(scraper.dead_letters.entries)
+        # One session file for every browser, written once they are done
+        for scraper in scrapers:
+            if scraper.session_state is not None:
+                scraper.save_session()
+                break
+        return jobs
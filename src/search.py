@@ -0,0 +1,352 @@
+###
+#    Search helpers for scraped BrighterMonday job listings.
+#
+#    A JobIndex loads a json snapshot once and keeps pre-lowercased fields
+#    and a trigram index in memory, so any number of queries can be answered
+#    without re-reading or re-scanning the whole file.
+###
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import re
+
+from resultcache import snapshot_fingerprint
+from store import load_jobs
+
+# Matches patterns like '1 day ago', '4 weeks ago', '5 minutes'...
+date_posted_regexp = re.compile(r'^\d+\s+(minute|hour|day|week|month)s?\s?(ago)?$',
+        re.IGNORECASE)
+
+# Job fields a free-text query can be run against
+SEARCH_FIELDS = ('Title', 'Location', 'Poster')
+
+# Single-field search kinds and the job field each one searches. The same
+# names are used as keys in batch query files.
+SEARCH_KINDS = OrderedDict([
+    ('title', 'Title'),
+    ('location', 'Location'),
+    ('company', 'Poster'),
+])
+
+
+# Turns a date string like '2 weeks ago' into the short form '2w' used by
+# the site. Month has to become 'mo' so it isn't mistaken for minutes.
+def normalize_date(date_posted):
+    date_posted = date_posted.lower().split(' ')
+    if len(date_posted) < 2:
+        return date_posted[0]
+    time_count = date_posted[0]
+    period_indicator = ''
+    # if the user entered 'month[s]' we have to make sure we've
+    # extracted 'mo' from the string
+    if date_posted[1] in 'months':
+        period_indicator = date_posted[1][:2]
+    else:
+        period_indicator = date_posted[1][:1]
+    return '{}{}'.format(time_count, period_indicator)
+
+
+# Compares user-provided date string and values from the file.
+# The file may hold either the short ('1d', '3h') or the long ('1 day ago')
+# form, so both sides are normalized before comparing.
+# Returns true if they match, false otherwise
+def compare_dates(date_1, date_2):
+    return normalize_date(date_1) == normalize_date(date_2)
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class JobIndex:
+    """ In-memory index over a list of scraped jobs
+        Logic: Substring queries of three or more characters are narrowed down
+        with a trigram index and then confirmed with a plain `in` check, so
+        results are exactly what a full scan would return, in file order.
+    """
+
+    def __init__(self, jobs, file_name=None, fingerprint=None, cache=None):
+        self.jobs = jobs
+        self.file_name = file_name
+        # Identifies the snapshot content for cache keys; no fingerprint
+        # means results are never cached
+        self.fingerprint = fingerprint
+        self.cache = cache
+
+        # Lowercased copies of the searchable fields, one list per field
+        self.fields = {}
+        # trigram -> set of job positions, one dict per field
+        self.grams = {}
+        for field in SEARCH_FIELDS:
+            values = [job.get(field, '').lower() for job in jobs]
+            grams = {}
+            for pos, value in enumerate(values):
+                for gram in trigrams(value):
+                    grams.setdefault(gram, set()).add(pos)
+            self.fields[field] = values
+            self.grams[field] = grams
+
+        # normalized date per job, and normalized date -> job positions
+        self.normalized_dates = [normalize_date(job.get('Date_Posted', '')) for job in jobs]
+        self.dates = {}
+        for pos, date_posted in enumerate(self.normalized_dates):
+            self.dates.setdefault(date_posted, []).append(pos)
+
+    @classmethod
+    def from_file(cls, file_name, cache=None):
+        fingerprint = snapshot_fingerprint(file_name)
+        return cls(load_jobs(file_name), file_name, fingerprint, cache)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    # Returns positions of jobs whose `field` contains `text`, in file order
+    def match(self, field, text):
+        text = text.lower()
+        values = self.fields[field]
+        if len(text) < 3:
+            return [pos for pos, value in enumerate(values) if text in value]
+
+        grams = self.grams[field]
+        candidates = None
+        # Intersect the smallest posting sets first
+        for gram in sorted(trigrams(text), key=lambda g: len(grams.get(g, ()))):
+            postings = grams.get(gram)
+            if not postings:
+                return []
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        return [pos for pos in sorted(candidates) if text in values[pos]]
+
+    def match_date(self, date_posted):
+        return list(self.dates.get(normalize_date(date_posted), []))
+
+    def _positions(self, kind, criteria):
+        if kind == 'date_posted':
+            return self.match_date(criteria[0])
+        if kind == 'all':
+            title, location, poster, date_posted = criteria
+            positions = set(self.match_date(date_posted))
+            for field, text in (('Title', title), ('Location', location), ('Poster', poster)):
+                if not positions:
+                    break
+                positions &= set(self.match(field, text))
+            return sorted(positions)
+        return self.match(SEARCH_KINDS[kind], criteria[0])
+
+    # Cache key for a search: snapshot fingerprint, search kind and the
+    # criteria normalized the way matching sees them
+    def query_key(self, kind, criteria):
+        if kind == 'date_posted':
+            normalized = [normalize_date(criteria[0])]
+        elif kind == 'all':
+            normalized = [text.lower() for text in criteria[:3]] + [normalize_date(criteria[3])]
+        else:
+            normalized = [criteria[0].lower()]
+        return (self.fingerprint, kind) + tuple(normalized)
+
+    # Returns positions of the jobs matching a search of the given kind,
+    # going through the result cache when there is one
+    def search(self, kind, *criteria):
+        if self.cache is None or self.fingerprint is None:
+            return self._positions(kind, criteria)
+
+        key = self.query_key(kind, criteria)
+        positions = self.cache.get(key)
+        if positions is None:
+            positions = self._positions(kind, criteria)
+            self.cache.put(key, positions)
+        return positions
+
+    def _jobs_at(self, positions):
+        return [self.jobs[pos] for pos in positions]
+
+    def search_by_title(self, title):
+        return self._jobs_at(self.search('title', title))
+
+    def search_by_location(self, location):
+        return self._jobs_at(self.search('location', location))
+
+    def search_by_postedby(self, poster):
+        return self._jobs_at(self.search('company', poster))
+
+    def search_by_date_posted(self, date_posted):
+        return self._jobs_at(self.search('date_posted', date_posted))
+
+    def search_by_all(self, title, location, poster, date_posted):
+        return self._jobs_at(self.search('all', title, location, poster, date_posted))
+
+
+# Loads saved searches from a json file. The file holds a list of objects
+# such as {"name": "nairobi devs", "title": "developer", "location": "nairobi"};
+# any of title, location, company and date_posted may be left out.
+def load_queries(file_name):
+    with open(file_name, 'r') as f:
+        queries = json.load(f)
+
+    if not isinstance(queries, list):
+        raise ValueError('Query file must hold a list of query objects')
+
+    names = set()
+    for number, query in enumerate(queries, 1):
+        if not isinstance(query, dict):
+            raise ValueError('Query {}: should be an object, not {}'.format(number, json.dumps(query)))
+        unknown = set(query) - set(SEARCH_KINDS) - {'name', 'date_posted'}
+        if unknown:
+            raise ValueError('Query {}: unknown keys {}'.format(number, ', '.join(sorted(unknown))))
+        for key, value in query.items():
+            if not isinstance(value, str):
+                raise ValueError('Query {}: {} should be a string, not {}'.format(number, key, json.dumps(value)))
+        date_posted = query.get('date_posted')
+        if date_posted and not date_posted_regexp.search(date_posted):
+            raise ValueError('Query {}: date posted should look like '
+                    '[1 day ago, 2 weeks ago, 2 hours, and so on]'.format(number))
+        query.setdefault('name', 'query-{}'.format(number))
+        if query['name'] in names:
+            raise ValueError('Query {}: duplicate name {!r}'.format(number, query['name']))
+        names.add(query['name'])
+    return queries
+
+
+# Compiles a query into a predicate over job positions in `index`.
+# Only the criteria the query actually sets are checked.
+def compile_query(query, index):
+    checks = []
+    for key, field in SEARCH_KINDS.items():
+        if query.get(key):
+            checks.append((query[key].lower(), index.fields[field]))
+    date_posted = query.get('date_posted')
+    wanted_date = normalize_date(date_posted) if date_posted else None
+    dates = index.normalized_dates
+
+    def predicate(pos):
+        if wanted_date is not None and dates[pos] != wanted_date:
+            return False
+        for text, values in checks:
+            if text not in values[pos]:
+                return False
+        return True
+
+    return predicate
+
+
+# Cache key for a saved search; the name is left out so renaming a search
+# still hits the cache
+def batch_query_key(index, query):
+    key = (index.fingerprint, 'batch')
+    for name in SEARCH_KINDS:
+        key += (query.get(name, '').lower(),)
+    date_posted = query.get('date_posted')
+    return key + (normalize_date(date_posted) if date_posted else '',)
+
+
+# Evaluates every query in one pass over the jobs and returns an ordered
+# mapping of query name -> {'query', 'count', 'jobs'}
+def run_batch(index, queries):
+    matches = OrderedDict()
+    compiled = []
+    for query in queries:
+        positions = None
+        if index.cache is not None and index.fingerprint is not None:
+            positions = index.cache.get(batch_query_key(index, query))
+        if positions is None:
+            positions = []
+            compiled.append((positions, query, compile_query(query, index)))
+        matches[query['name']] = positions
+
+    # Only the searches that weren't cached need the pass over the jobs
+    if compiled:
+        for pos in range(len(index)):
+            for positions, query, predicate in compiled:
+                if predicate(pos):
+                    positions.append(pos)
+        if index.cache is not None and index.fingerprint is not None:
+            for positions, query, predicate in compiled:
+                index.cache.put(batch_query_key(index, query), positions)
+
+    results = OrderedDict()
+    for query in queries:
+        positions = matches[query['name']]
+        results[query['name']] = OrderedDict([
+            ('query', query),
+            ('count', len(positions)),
+            ('jobs', [index.jobs[pos] for pos in positions]),
+        ])
+    return results
+
+
+# Jobs are the same listing across snapshots when they share a link;
+# jobs without one can only be told apart by their ID
+def dedup_key(job):
+    link = job.get('Link', '')
+    if not link or link == 'No link available':
+        return ('ID', job.get('ID'))
+    return ('Link', link)
+
+
+# Merges job lists from several snapshots, given newest first, keeping the
+# newest copy of every listing
+def merge_jobs(job_lists):
+    seen = set()
+    merged = []
+    for jobs in job_lists:
+        for job in jobs:
+            key = dedup_key(job)
+            if key not in seen:
+                seen.add(key)
+                merged.append(job)
+    return merged
+
+
+def _load_snapshot(file_name):
+    return snapshot_fingerprint(file_name), load_jobs(file_name)
+
+
+def _search_snapshot(file_name, queries):
+    results = run_batch(JobIndex.from_file(file_name), queries)
+    return [results[query['name']]['jobs'] for query in queries]
+
+
+def _pool(file_names, workers):
+    # Single-file searches never need worker processes
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(file_names)))
+
+
+# Loads several snapshots in parallel into one index with duplicate listings
+# removed. The fingerprint covers every file, so cached results are dropped
+# as soon as any of them changes.
+def load_snapshots(file_names, workers=None, cache=None):
+    if len(file_names) == 1:
+        return JobIndex.from_file(file_names[0], cache)
+
+    newest_first = list(reversed(file_names))
+    with _pool(file_names, workers) as pool:
+        loaded = list(pool.map(_load_snapshot, newest_first))
+
+    fingerprint = hashlib.sha256(' '.join(fp for fp, jobs in loaded).encode('utf-8')).hexdigest()
+    label = '{} snapshots ({} ... {})'.format(len(file_names),
+            os.path.basename(file_names[0]), os.path.basename(file_names[-1]))
+    return JobIndex(merge_jobs(jobs for fp, jobs in loaded), label, fingerprint, cache)
+
+
+# Runs saved searches over many snapshots. Every file is loaded and matched
+# in a worker process and only the matching jobs are sent back, which are
+# then merged per search with duplicate listings removed.
+def search_snapshots(file_names, queries, workers=None):
+    newest_first = list(reversed(file_names))
+    with _pool(file_names, workers) as pool:
+        per_file = list(pool.map(_search_snapshot, newest_first, [queries] * len(newest_first)))
+
+    results = OrderedDict()
+    for number, query in enumerate(queries):
+        jobs = merge_jobs(matches[number] for matches in per_file)
+        results[query['name']] = OrderedDict([
+            ('query', query),
+            ('count', len(jobs)),
+            ('jobs', jobs),
+        ])
+    return results
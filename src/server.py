@@ -0,0 +1,212 @@
+###
+#    Local HTTP search API for scraped job listings.
+#
+#    Snapshots are loaded and indexed once at startup and kept in memory;
+#    folders are watched for new brightermondayjobs_*.json files, which are
+#    picked up without restarting the server. Searches behave exactly like
+#    the interactive search menu.
+#
+#    Endpoints (GET, json responses):
+#        /snapshots
+#        /search/title?q=developer
+#        /search/location?q=nairobi
+#        /search/company?q=clifford
+#        /search/date_posted?q=2+weeks+ago
+#        /search/all?title=...&location=...&company=...&date_posted=...
+#    Every search accepts `snapshot=<file name>` (default: newest snapshot)
+#    and `limit=<n>`.
+###
+
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+import asyncio
+import json
+import os
+
+from resultcache import ResultCache, snapshot_fingerprint
+from search import JobIndex, SEARCH_KINDS, date_posted_regexp
+from store import expand_snapshot_paths, to_json
+
+# How often watched folders are checked for new or changed snapshots
+RELOAD_INTERVAL = 5
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class SnapshotStore:
+    """ Keeps one JobIndex per snapshot file in memory
+        Logic: Sources may be files, folders or glob patterns and are rescanned by
+        `reload()`, which only loads files that are new or whose fingerprint
+        changed, so a running server follows new scrapes as they land.
+    """
+
+    def __init__(self, sources, cache=None):
+        self.sources = sources
+        self.cache = cache
+        # file name -> JobIndex, ordered oldest to newest snapshot
+        self.indexes = OrderedDict()
+
+    def reload(self):
+        changed = []
+        indexes = OrderedDict()
+        for file_name in expand_snapshot_paths(self.sources):
+            index = self.indexes.get(file_name)
+            try:
+                if index is None or index.fingerprint != snapshot_fingerprint(file_name):
+                    index = JobIndex.from_file(file_name, self.cache)
+                    changed.append(file_name)
+            except (OSError, ValueError) as e:
+                # Most likely a scrape still writing the file; try again later
+                print('>>> Could not load {}: {}'.format(file_name, e))
+                if index is None:
+                    continue
+            indexes[file_name] = index
+        self.indexes = indexes
+        return changed
+
+    def get(self, name=None):
+        if not self.indexes:
+            raise HTTPError(404, 'No snapshots loaded')
+        if name is None:
+            return next(reversed(self.indexes.values()))
+        for file_name, index in self.indexes.items():
+            if name in (file_name, os.path.basename(file_name)):
+                return index
+        raise HTTPError(404, 'Unknown snapshot: {}'.format(name))
+
+
+class SearchServer:
+
+    def __init__(self, store, reload_interval=RELOAD_INTERVAL):
+        self.store = store
+        self.reload_interval = reload_interval
+
+    def snapshots(self, params):
+        return OrderedDict([
+            ('snapshots', [OrderedDict([
+                ('file', os.path.basename(file_name)),
+                ('jobs', len(index)),
+                ('fingerprint', index.fingerprint),
+            ]) for file_name, index in self.store.indexes.items()]),
+        ])
+
+    def search(self, kind, params):
+        def param(name, required=False):
+            values = params.get(name)
+            if not values:
+                if required:
+                    raise HTTPError(400, 'Missing query parameter: {}'.format(name))
+                return ''
+            return values[0]
+
+        if kind == 'all':
+            criteria = [param('title'), param('location'), param('company'),
+                    param('date_posted', required=True)]
+        elif kind == 'date_posted' or kind in SEARCH_KINDS:
+            criteria = [param('q', required=True)]
+        else:
+            raise HTTPError(404, 'Unknown search: {}'.format(kind))
+
+        if kind in ('date_posted', 'all') and not date_posted_regexp.search(criteria[-1]):
+            raise HTTPError(400, 'Please enter the date posted as '
+                    '[1 day ago, 2 weeks ago, 2 hours, and so on]')
+
+        limit = param('limit')
+        if limit and not limit.isdigit():
+            raise HTTPError(400, 'limit must be a whole number')
+
+        index = self.store.get(param('snapshot') or None)
+        positions = index.search(kind, *criteria)
+        shown = positions[:int(limit)] if limit else positions
+        return OrderedDict([
+            ('snapshot', os.path.basename(index.file_name)),
+            ('count', len(positions)),
+            ('jobs', [index.jobs[pos] for pos in shown]),
+        ])
+
+    def route(self, method, target):
+        if method != 'GET':
+            raise HTTPError(405, 'Only GET is supported')
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        parts = url.path.strip('/').split('/')
+        if parts == ['snapshots']:
+            return self.snapshots(params)
+        if len(parts) == 2 and parts[0] == 'search':
+            return self.search(parts[1], params)
+        raise HTTPError(404, 'Not found: {}'.format(url.path))
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    status, body = 200, self.route(method, target)
+                except HTTPError as e:
+                    status, body = e.status, {'error': e.message}
+                except ValueError:
+                    status, body, version = 400, {'error': 'Malformed request'}, 'HTTP/1.0'
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                payload = json.dumps(body, default=to_json).encode('utf-8')
+                writer.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n'
+                        'Content-Length: {}\r\nConnection: {}\r\n\r\n'.format(
+                            status, REASONS[status], len(payload),
+                            'keep-alive' if keep_alive else 'close').encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            # Loading is blocking file and CPU work, keep it off the event loop
+            changed = await loop.run_in_executor(None, self.store.reload)
+            for file_name in changed:
+                print('>>> Loaded snapshot {} ({} jobs)'.format(
+                    file_name, len(self.store.indexes[file_name])))
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        watcher = asyncio.ensure_future(self.watch())
+        print('Serving job search on http://{}:{}/ (Ctrl+C to stop)'.format(host, port))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+# Loads the given snapshot files/folders and serves searches until interrupted
+def serve(sources, host='127.0.0.1', port=8080, cache_dir=None):
+    store = SnapshotStore(sources, ResultCache(max_entries=1024, cache_dir=cache_dir))
+    for file_name in store.reload():
+        print('>>> Loaded snapshot {} ({} jobs)'.format(file_name, len(store.indexes[file_name])))
+    try:
+        asyncio.run(SearchServer(store).serve(host, port))
+    except KeyboardInterrupt:
+        print('Server stopped.')
@@ -0,0 +1,86 @@
+###
+#    Session state kept between scrape runs.
+#
+#    The first run accepts the cookie consent banner; its cookies and the
+#    fact that consent was given are saved at the end of the run. Later runs
+#    restore them before the first page load (into the browser through
+#    DevTools, and as a Cookie header for plain HTTP fetches), so the
+#    consent flow and its wait are skipped.
+###
+
+from collections import OrderedDict
+from datetime import datetime
+from time import time
+from urllib.parse import urlsplit
+import json
+import os
+
+DEFAULT_SESSION = 'brightermondayjobs.session.json'
+
+# Cookies OneTrust sets once the banner has been dealt with
+CONSENT_COOKIES = ('OptanonAlertBoxClosed', 'OptanonConsent')
+
+
+# True if a cookie with the given domain and path would be sent to `url`
+def cookie_matches(cookie, url):
+    parts = urlsplit(url)
+    host = parts.hostname or ''
+    domain = cookie.get('domain', host).lstrip('.')
+    if host != domain and not host.endswith('.' + domain):
+        return False
+    if cookie.get('secure') and parts.scheme != 'https':
+        return False
+    return (parts.path or '/').startswith(cookie.get('path', '/'))
+
+
+# Cookie header value for `url`, or None if no cookie applies
+def cookie_header(cookies, url):
+    pairs = ['{}={}'.format(cookie['name'], cookie['value']) for cookie in cookies if cookie_matches(cookie, url)]
+    return '; '.join(pairs) or None
+
+
+class SessionStore:
+    """ Cookies and consent state of the last run, saved as json
+    """
+
+    def __init__(self, file_name=DEFAULT_SESSION):
+        self.file_name = file_name
+        self.cookies = []
+        self.consent_given = False
+        self.saved_at = None
+
+    @classmethod
+    def load(cls, file_name=DEFAULT_SESSION):
+        session = cls(file_name)
+        if not os.path.exists(file_name):
+            return session
+        with open(file_name, 'r') as f:
+            state = json.load(f, object_pairs_hook=OrderedDict)
+        now = time()
+        # Expired cookies would be dropped by the browser anyway
+        session.cookies = [cookie for cookie in state.get('cookies', []) if cookie.get('expiry', now + 1) > now]
+        session.saved_at = state.get('saved_at')
+        names = {cookie['name'] for cookie in session.cookies}
+        # Consent only still counts while its cookie is around
+        session.consent_given = state.get('consent_given', False) and any(name in names for name in CONSENT_COOKIES)
+        return session
+
+    def update(self, cookies, consent_given):
+        self.cookies = list(cookies)
+        self.consent_given = consent_given
+
+    def save(self):
+        state = OrderedDict([
+            ('saved_at', datetime.now().isoformat()),
+            ('consent_given', self.consent_given),
+            ('cookies', self.cookies),
+        ])
+        with open(self.file_name + '.tmp', 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(self.file_name + '.tmp', self.file_name)
+
+    def clear(self):
+        self.cookies = []
+        self.consent_given = False
+        if os.path.exists(self.file_name):
+            os.remove(self.file_name)
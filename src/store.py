@@ -0,0 +1,84 @@
+###
+#    Snapshot files: where the scraper saves jobs and searches read them.
+#
+#    Every scrape is saved as brightermondayjobs_<YYYYmmdd-HHMMSS>.json, a
+#    json list of jobs, in the current folder or a --store folder. Jobs are
+#    loaded as job.Job records and written back byte for byte as they were.
+#    This module only needs the standard library, so searches and library
+#    users can read snapshots without pulling in the scraping stack.
+###
+
+from datetime import datetime
+import glob
+import json
+import os
+
+from job import Job
+
+# Snapshot files written by the scraper
+SNAPSHOT_PATTERN = 'brightermondayjobs_*.json'
+
+
+def snapshot_timestamp(moment=None):
+    return (moment or datetime.now()).strftime('%Y%m%d-%H%M%S')
+
+
+def snapshot_path(store_dir, timestamp):
+    return os.path.join(store_dir, 'brightermondayjobs_{}.json'.format(timestamp))
+
+
+# Path of the URLs that kept failing in the run saved at `timestamp`. The
+# name stays outside SNAPSHOT_PATTERN, so these are never loaded as jobs.
+def dead_letters_path(store_dir, timestamp):
+    return os.path.join(store_dir, 'brightermondayjobs-deadletters_{}.json'.format(timestamp))
+
+
+# `default` hook for json.dump() of anything holding Job records
+def to_json(value):
+    if isinstance(value, Job):
+        return value.to_dict()
+    raise TypeError('Object of type {} is not JSON serializable'.format(type(value).__name__))
+
+
+_encoder = json.JSONEncoder(default=to_json)
+
+
+# Writes exactly what json.dump(jobs, f) writes for the same jobs as dicts,
+# one job at a time, so no dict copy of the whole list is ever built
+def dump_jobs(jobs, f):
+    f.write('[')
+    for number, job in enumerate(jobs):
+        if number:
+            f.write(', ')
+        f.write(_encoder.encode(job))
+    f.write(']')
+
+
+def save_jobs(jobs, file_name):
+    with open(file_name, 'w') as f:
+        dump_jobs(jobs, f)
+
+
+# Raises ValueError for json that isn't a list of jobs, e.g. a query file
+# or a checkpoint picked up by a glob
+def load_jobs(file_name):
+    with open(file_name, 'r') as f:
+        jobs = json.load(f, object_pairs_hook=Job)
+    if not isinstance(jobs, list) or not all(isinstance(job, Job) and 'Title' in job for job in jobs):
+        raise ValueError('not a snapshot file: {}'.format(file_name))
+    return jobs
+
+
+# Expands snapshot arguments into a sorted list of files. Each argument may
+# be a file, a folder (all snapshots inside it) or a glob pattern.
+def expand_snapshot_paths(patterns):
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(glob.glob(os.path.join(pattern, SNAPSHOT_PATTERN)))
+        elif glob.has_magic(pattern):
+            files.extend(path for path in glob.glob(pattern) if os.path.isfile(path))
+        elif os.path.exists(pattern):
+            files.append(pattern)
+    # The timestamp in the file name sorts snapshots by age
+    return sorted(set(files), key=os.path.basename)
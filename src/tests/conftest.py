@@ -0,0 +1,8 @@
+###
+#    Makes the modules in src importable when pytest runs from anywhere.
+###
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,34 @@
+###
+#    Import-time budget of the search entry points, see benchmarks/imports.py.
+#
+#    Every case runs in a fresh interpreter, so this checks what a user
+#    starting a search actually pays, not what this test process has
+#    already imported.
+###
+
+import pytest
+
+from benchmarks.imports import IMPORT_BUDGETS, forbidden_imports, import_cases, import_seconds, importtime
+
+# Runs per case; the fastest one is compared with the budget so a busy
+# machine doesn't fail the check
+RUNS = 3
+
+
+@pytest.fixture(scope='module')
+def cases(tmp_path_factory):
+    return import_cases(str(tmp_path_factory.mktemp('imports')))
+
+
+@pytest.fixture(scope='module')
+def startup():
+    return {name for name, seconds, nested in importtime(['-c', 'pass'])}
+
+
+@pytest.mark.parametrize('case', list(IMPORT_BUDGETS))
+def test_import_budget(case, cases, startup):
+    runs = [importtime(cases[case]) for _ in range(RUNS)]
+    assert forbidden_imports(runs[0]) == []
+    seconds = min(import_seconds(imports, startup) for imports in runs)
+    assert seconds <= IMPORT_BUDGETS[case] / 1000, '{} took {:.1f} ms, budget {} ms'.format(
+        case, seconds * 1000, IMPORT_BUDGETS[case])